@@ -48,8 +48,16 @@ case "$1" in
                 echo "Restarting collector..."
                 docker compose restart woodsgate-collector
                 ;;
+            calibrate)
+                # The collector holds the ADC, so stop it while calibrating
+                echo "Stopping collector for calibration..."
+                docker compose stop woodsgate-collector
+                docker compose run --rm --no-deps woodsgate-collector calibrate "${@:3}"
+                echo "Starting collector..."
+                docker compose start woodsgate-collector
+                ;;
             *)
-                echo "Usage: $0 collector {logs|shell|restart}"
+                echo "Usage: $0 collector {logs|shell|restart|calibrate}"
                 ;;
         esac
         ;;
@@ -88,6 +96,8 @@ case "$1" in
         echo "  collector logs     - Show only collector logs"
         echo "  collector shell    - Open shell in collector container"
         echo "  collector restart  - Restart only collector"
+        echo "  collector calibrate --point {min|max} [--tank NAME]"
+        echo "                     - Measure v_min/v_max and save it to collector.json"
         echo "  webgui logs        - Show only webgui logs"
         echo "  webgui shell       - Open shell in webgui container"
         echo "  webgui restart     - Restart only webgui"
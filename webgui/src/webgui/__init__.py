@@ -1,7 +1,7 @@
 import argparse
+import json
 import sys
 from pathlib import Path
-from webgui.index import run
 
 
 def parse_args() -> argparse.Namespace:
@@ -27,34 +27,134 @@ def parse_args() -> argparse.Namespace:
         help="Path to the SQLite database file",
     )
 
+    parser.add_argument(
+        "--tank",
+        action="append",
+        default=[],
+        metavar="NAME=PATH",
+        help="Tank name and its SQLite database file; repeat for several "
+        "tanks. Overrides --db-path",
+    )
+
+    parser.add_argument(
+        "--config",
+        type=str,
+        default=None,
+        metavar="PATH",
+        help="Collector configuration (collector.json) to read tank names, "
+        "databases and heights from. Overrides --tank and --db-path; ignored "
+        "if the file does not exist, like in the collector",
+    )
+
+    # Aggregation
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Worker processes for long minute/hour views; 1 disables the pool",
+    )
+
+    # Diagnostics
+    parser.add_argument(
+        "--profile-memory",
+        action="store_true",
+        help="Print tracemalloc peak memory and time for every view build",
+    )
+
     return parser.parse_args()
 
 
+def load_collector_tanks(path: Path) -> tuple[dict[str, Path], dict[str, float]]:
+    """Read the tanks from the collector's configuration file.
+
+    Follows the collector's defaults: a tank without a database is stored in
+    /shared_data/<name>.db, and a tank without a height uses the repository
+    default.
+
+    Args:
+        path: Path to collector.json
+
+    Returns:
+        Tuple of database path per tank name and height per tank name; both
+        are empty if the file lists no tanks
+
+    Raises:
+        ValueError: If the file is not valid JSON or a tank is malformed
+    """
+    with open(path) as f:
+        config = json.load(f)
+
+    tank_paths: dict[str, Path] = {}
+    tank_heights: dict[str, float] = {}
+    for tank in config.get("tanks", []):
+        name = tank.get("name")
+        if not name:
+            raise ValueError(f"Tank without a name: {tank}")
+        if name in tank_paths:
+            raise ValueError(f"Duplicate tank name: {name}")
+        tank_paths[name] = Path(tank.get("database") or f"/shared_data/{name}.db")
+        if "tank_height" in tank:
+            tank_heights[name] = float(tank["tank_height"])
+    return tank_paths, tank_heights
+
+
 def main(args: argparse.Namespace | None = None, reload: bool = False) -> None:
     """Main entry point for the web application with argument parsing."""
+    # Imported here so that importing the package, e.g. in aggregation
+    # worker processes, does not load NiceGUI and register the pages
+    from webgui.index import run
 
     args = args or parse_args()
 
+    tank_paths: dict[str, Path] = {}
+    for tank in args.tank:
+        name, sep, path = tank.partition("=")
+        if not sep or not name or not path:
+            print(f"Error: Invalid --tank '{tank}', expected NAME=PATH", file=sys.stderr)
+            sys.exit(1)
+        tank_paths[name] = Path(path)
+
+    tank_heights: dict[str, float] = {}
+    if args.config is not None and Path(args.config).exists():
+        try:
+            config_paths, tank_heights = load_collector_tanks(Path(args.config))
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            print(f"Error: Invalid configuration '{args.config}': {e}", file=sys.stderr)
+            sys.exit(1)
+        tank_paths = config_paths or tank_paths
+        print(f"⚙️  Configuration: {Path(args.config).absolute()}")
+
     db_path = Path(args.db_path)
-    if not db_path.exists():
-        print(f"Error: Database file '{db_path}' not found!", file=sys.stderr)
-        sys.exit(1)
+    for path in tank_paths.values() or [db_path]:
+        if not path.exists():
+            print(f"Error: Database file '{path}' not found!", file=sys.stderr)
+            sys.exit(1)
 
     if reload:
         print("🔄 Running in development mode with hot reload enabled")
     else:
         print("🚀 Running in production mode")
 
-    print(f"🗄️  Database: {db_path.absolute()}")
+    if tank_paths:
+        for name, path in tank_paths.items():
+            print(f"🗄️  Tank '{name}': {path.absolute()}")
+    else:
+        print(f"🗄️  Database: {db_path.absolute()}")
     print(f"🌐 Server: http://{args.host}:{args.port}")
     print("Starting server...")
 
     try:
         run(
-            db_path=str(db_path.absolute()),
+            db_path=(
+                {name: str(path.absolute()) for name, path in tank_paths.items()}
+                or str(db_path.absolute())
+            ),
             host=args.host,
             port=args.port,
             reload=reload,
+            profile_memory=args.profile_memory,
+            workers=args.workers,
+            tank_heights=tank_heights,
         )
     except KeyboardInterrupt:
         print("\n👋 Shutting down gracefully...")
@@ -0,0 +1,196 @@
+"""Incremental time-bucket aggregation for water measurement data."""
+
+from collections.abc import Iterable
+
+import numpy as np
+import pandas as pd
+
+# Pandas frequency aliases for each granularity offered in the UI
+GRANULARITY_FREQ: dict[str, str] = {
+    "minute": "min",
+    "hour": "h",
+    "day": "D",
+    "week": "W",
+    "month": "ME",
+}
+
+VALUE_COLUMNS: tuple[str, ...] = ("level", "volume")
+
+# Partial aggregate columns kept per value column. These can be merged across
+# chunks without revisiting the raw rows.
+PARTIAL_FIELDS: tuple[str, ...] = ("count", "sum", "sumsq", "min", "max")
+
+
+def bucket_labels(times: pd.Series | np.ndarray, granularity: str) -> pd.DatetimeIndex:
+    """Compute the bucket label for each timestamp.
+
+    Labels match those produced by ``pd.Grouper(freq=GRANULARITY_FREQ[...])``:
+    fixed frequencies are floored, weeks and months are labelled by their
+    last day.
+
+    Args:
+        times: Timestamps as int64 epoch seconds or datetime64 values
+        granularity: One of the keys of GRANULARITY_FREQ
+
+    Returns:
+        DatetimeIndex of bucket labels, one per input timestamp
+    """
+    if granularity not in GRANULARITY_FREQ:
+        raise ValueError(f"Unknown granularity: {granularity}")
+
+    values = np.asarray(times)
+    if values.dtype.kind in "iu":
+        index = pd.to_datetime(values, unit="s")
+    else:
+        index = pd.DatetimeIndex(values)
+
+    if granularity == "week":
+        return index.to_period("W-SUN").to_timestamp(how="end").normalize()
+    if granularity == "month":
+        return index.to_period("M").to_timestamp(how="end").normalize()
+    return index.floor(GRANULARITY_FREQ[granularity])
+
+
+def partial_aggregate(chunk: pd.DataFrame, granularity: str) -> pd.DataFrame:
+    """Reduce one chunk of raw rows to mergeable per-bucket partials.
+
+    Args:
+        chunk: DataFrame with columns time, level, volume
+        granularity: One of the keys of GRANULARITY_FREQ
+
+    Returns:
+        DataFrame indexed by bucket label with ``<column>_<field>`` columns
+        for every value column and partial field
+    """
+    labels = bucket_labels(chunk["time"].to_numpy(), granularity)
+    parts: dict[str, pd.Series] = {}
+    for column in VALUE_COLUMNS:
+        # Accumulate in float64 so sums of squares stay precise on long ranges
+        values = pd.Series(chunk[column].to_numpy(dtype=np.float64), index=labels)
+        grouped = values.groupby(level=0, sort=True)
+        parts[f"{column}_count"] = grouped.count().astype(np.float64)
+        parts[f"{column}_sum"] = grouped.sum()
+        parts[f"{column}_sumsq"] = (values * values).groupby(level=0, sort=True).sum()
+        parts[f"{column}_min"] = grouped.min()
+        parts[f"{column}_max"] = grouped.max()
+    partial = pd.DataFrame(parts)
+    partial.index.name = "time"
+    return partial
+
+
+def merge_partials(partials: Iterable[pd.DataFrame]) -> pd.DataFrame:
+    """Merge per-chunk partial aggregates into one partial per bucket.
+
+    Args:
+        partials: Frames as returned by partial_aggregate
+
+    Returns:
+        Merged partial aggregates sorted by bucket label
+    """
+    frames = [p for p in partials if not p.empty]
+    if not frames:
+        return pd.DataFrame(
+            columns=[f"{c}_{f}" for c in VALUE_COLUMNS for f in PARTIAL_FIELDS],
+            index=pd.DatetimeIndex([], name="time"),
+            dtype=np.float64,
+        )
+    if len(frames) == 1:
+        return frames[0]
+
+    combined = pd.concat(frames).groupby(level=0, sort=True)
+    merged: dict[str, pd.Series] = {}
+    for column in VALUE_COLUMNS:
+        for field in ("count", "sum", "sumsq"):
+            merged[f"{column}_{field}"] = combined[f"{column}_{field}"].sum()
+        merged[f"{column}_min"] = combined[f"{column}_min"].min()
+        merged[f"{column}_max"] = combined[f"{column}_max"].max()
+    result = pd.DataFrame(merged)
+    result.index.name = "time"
+    return result
+
+
+def aggregate_chunks(chunks: Iterable[pd.DataFrame], granularity: str) -> pd.DataFrame:
+    """Aggregate a stream of raw chunks into per-bucket partials.
+
+    Only one raw chunk is held at a time, so peak memory depends on the
+    chunk size and the number of buckets rather than the number of rows.
+    Per-chunk partials are merged once at the end; chunks are in time order,
+    so they overlap in at most one bucket and add little to the total.
+
+    Args:
+        chunks: Iterable of DataFrames with columns time, level, volume
+        granularity: One of the keys of GRANULARITY_FREQ
+
+    Returns:
+        Merged partial aggregates, see merge_partials
+    """
+    return merge_partials(
+        [partial_aggregate(chunk, granularity) for chunk in chunks if not chunk.empty]
+    )
+
+
+def finalize(partials: pd.DataFrame) -> pd.DataFrame:
+    """Turn partial aggregates into descriptive statistics per bucket.
+
+    Buckets without any level or volume values are dropped.
+
+    Args:
+        partials: Merged partial aggregates
+
+    Returns:
+        DataFrame with a time column followed by ``<column>_min``,
+        ``<column>_max``, ``<column>_mean`` and ``<column>_std`` for every
+        value column and a ``count`` column
+    """
+    stats: dict[str, pd.Series] = {}
+    valid = pd.Series(True, index=partials.index)
+    for column in VALUE_COLUMNS:
+        n = partials[f"{column}_count"]
+        total = partials[f"{column}_sum"]
+        mean = total / n
+        # Sample standard deviation, matching statistics.stdev
+        var = (partials[f"{column}_sumsq"] - total * mean) / (n - 1)
+        std = np.sqrt(var.clip(lower=0)).where(n > 1, 0.0)
+        stats[f"{column}_min"] = partials[f"{column}_min"]
+        stats[f"{column}_max"] = partials[f"{column}_max"]
+        stats[f"{column}_mean"] = mean
+        stats[f"{column}_std"] = std
+        valid &= n > 0
+
+    stats["count"] = pd.concat(
+        [partials[f"{column}_count"] for column in VALUE_COLUMNS], axis=1
+    ).min(axis=1)
+    result = pd.DataFrame(stats)[valid]
+    result["count"] = result["count"].astype(np.int64)
+    return result.reset_index()
+
+
+def summarize(partials: pd.DataFrame) -> dict[str, float] | None:
+    """Collapse all buckets into global statistics for the whole range.
+
+    Args:
+        partials: Merged partial aggregates
+
+    Returns:
+        Dictionary with the same keys as a finalize() row (without time), or
+        None if there are no values
+    """
+    if partials.empty:
+        return None
+    totals = pd.DataFrame(
+        {
+            **{
+                f"{c}_{f}": [partials[f"{c}_{f}"].sum()]
+                for c in VALUE_COLUMNS
+                for f in ("count", "sum", "sumsq")
+            },
+            **{f"{c}_min": [partials[f"{c}_min"].min()] for c in VALUE_COLUMNS},
+            **{f"{c}_max": [partials[f"{c}_max"].max()] for c in VALUE_COLUMNS},
+        },
+        index=pd.DatetimeIndex([pd.Timestamp(0)], name="time"),
+    )
+    final = finalize(totals)
+    if final.empty:
+        return None
+    row = final.iloc[0].drop("time")
+    return {key: float(value) for key, value in row.items()}
@@ -0,0 +1,93 @@
+"""Server-wide cache of rendered dashboard views."""
+
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from concurrent.futures import Future
+from typing import Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class ViewCache(Generic[T]):
+    """Thread-safe LRU cache with single-flight computation.
+
+    Concurrent requests for a key that is not cached yet are coalesced: the
+    first caller computes the value and every other caller waits for it.
+    """
+
+    def __init__(self, max_entries: int = 32) -> None:
+        """Initialize an empty cache.
+
+        Args:
+            max_entries: Maximum number of cached values before the least
+                recently used one is evicted
+        """
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Hashable, T] = OrderedDict()
+        self._in_flight: dict[Hashable, Future[T]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> T | None:
+        """Return the cached value for key, or None if it is not cached."""
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], T]) -> T:
+        """Return the cached value for key, computing it at most once.
+
+        Callers that wait for another caller's computation block their own
+        thread, so call this from worker threads rather than an event loop.
+
+        Args:
+            key: Hashable cache key
+            compute: Function producing the value on a cache miss
+
+        Returns:
+            The cached or freshly computed value
+
+        Raises:
+            Exception: Whatever compute raised, re-raised in every waiter
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._in_flight[key] = future
+
+        assert future is not None
+        if not owner:
+            return future.result()
+
+        try:
+            value = compute()
+        except BaseException as e:
+            with self._lock:
+                del self._in_flight[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            del self._in_flight[key]
+        future.set_result(value)
+        return value
+
+    def clear(self) -> None:
+        """Drop all cached values. Computations in flight are unaffected."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
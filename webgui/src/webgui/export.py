@@ -0,0 +1,47 @@
+"""Command line export of measurements to CSV."""
+
+import argparse
+import sys
+import time
+from datetime import date
+
+from webgui.repository import DEFAULT_CHUNKSIZE, WaterDataRepository
+
+
+def main() -> None:
+    """Stream a tank's measurements into a CSV file."""
+    parser = argparse.ArgumentParser(
+        description="Export WoodsGate measurements to CSV",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("output", help="Destination CSV file")
+    parser.add_argument("--db-path", default="data.db", help="SQLite database file")
+    parser.add_argument(
+        "--start", type=date.fromisoformat, help="First day (YYYY-MM-DD), inclusive"
+    )
+    parser.add_argument(
+        "--end", type=date.fromisoformat, help="Last day (YYYY-MM-DD), inclusive"
+    )
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=DEFAULT_CHUNKSIZE,
+        help="Rows held in memory at once",
+    )
+    args = parser.parse_args()
+
+    try:
+        repository = WaterDataRepository(args.db_path, read_only=True)
+    except FileNotFoundError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    start = time.perf_counter()
+    written = repository.export_csv(args.output, args.start, args.end, args.chunksize)
+    print(
+        f"💾 Wrote {written} rows to {args.output} in {time.perf_counter() - start:.2f} s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""Water level forecasting from daily consumption patterns."""
+
+import threading
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from webgui.aggregation import bucket_labels
+from webgui.repository import WaterDataRepository
+
+HOURS_PER_DAY: int = 24
+
+
+@dataclass(frozen=True)
+class Forecast:
+    """Projected water level from the latest measurement onwards."""
+
+    start: datetime
+    current_level: float
+    times: np.ndarray
+    levels: np.ndarray
+    daily_change: float
+    time_to_empty: timedelta | None
+
+
+class ConsumptionForecaster:
+    """Fits an hour-of-day level change profile and projects it forward.
+
+    The model is the mean hourly level change for each hour of the day over
+    the last window_days complete days. Hourly deltas are kept per day, so a
+    refit only reads the days completed since the previous fit. Projections
+    are clipped to the tank's height, cached per data version and cheap to
+    recompute.
+    """
+
+    def __init__(self, window_days: int = 28, horizon_days: int = 7) -> None:
+        """Initialize an unfitted forecaster.
+
+        Args:
+            window_days: Number of complete days the profile is fitted on
+            horizon_days: Number of days to project ahead
+        """
+        self.window_days = window_days
+        self.horizon_days = horizon_days
+        self._deltas: dict[date, np.ndarray] = {}
+        self._fitted_through: date | None = None
+        self._forecast: Forecast | None = None
+        self._version: int | None = None
+        self._lock = threading.Lock()
+
+    def latest(self) -> Forecast | None:
+        """Return the most recent forecast without computing anything."""
+        with self._lock:
+            return self._forecast
+
+    def refresh(
+        self,
+        repository: WaterDataRepository,
+        today: date | None = None,
+        tank: str | None = None,
+    ) -> Forecast | None:
+        """Refit on newly completed days and reproject if the data changed.
+
+        Meant to run off the request path, e.g. in the background prewarmer.
+        A forecaster always refreshes from the same tank.
+
+        Args:
+            repository: Repository to read measurements from
+            today: Current day; days before it are considered complete
+            tank: Tank name, defaults to the first tank
+
+        Returns:
+            The current forecast, or None if there is not enough data
+        """
+        version = repository.get_data_version(tank)
+        with self._lock:
+            if version == self._version:
+                return self._forecast
+
+        today = today or date.today()
+        self._fit_new_days(repository, today - timedelta(days=1), tank)
+
+        latest = repository.get_latest_measurement(tank)
+        forecast = None
+        if not latest.empty and self._deltas:
+            forecast = self._project(
+                latest["time"].iloc[0].to_pydatetime(),
+                float(latest["level"].iloc[0]),
+                repository.tank_height(tank),
+            )
+
+        with self._lock:
+            self._forecast = forecast
+            self._version = version
+        return forecast
+
+    def _fit_new_days(
+        self, repository: WaterDataRepository, last_complete: date, tank: str | None
+    ) -> None:
+        """Add hourly deltas for days completed since the previous fit."""
+        first_new = last_complete - timedelta(days=self.window_days - 1)
+        if self._fitted_through is not None:
+            first_new = max(first_new, self._fitted_through + timedelta(days=1))
+        if first_new > last_complete:
+            return
+
+        # The collector stores a row only when the level changes, so an hour
+        # without rows kept the level of the previous one. The level at the
+        # end of each hour is its last row, carried forward over empty hours.
+        hour_ends = []
+        for chunk in repository.iter_data_chunks(first_new, last_complete, tank=tank):
+            chunk = chunk.dropna(subset=["level"])
+            labels = bucket_labels(chunk["time"].to_numpy(), "hour")
+            hour_ends.append(chunk["level"].groupby(labels).last())
+        # Seed the grid with the level before first_new so its first hour has
+        # a predecessor
+        seed = repository.get_latest_measurement(tank, before=first_new)
+        grid = pd.date_range(
+            pd.Timestamp(first_new) - pd.Timedelta(hours=1),
+            pd.Timestamp(last_complete) + pd.Timedelta(hours=HOURS_PER_DAY - 1),
+            freq="h",
+        )
+        levels = pd.Series(np.nan, index=grid)
+        if not seed.empty:
+            levels.iloc[0] = seed["level"].iloc[0]
+        if hour_ends:
+            # Chunks are in time order; an hour split across chunks keeps the
+            # later value
+            last = pd.concat(hour_ends).groupby(level=0).last()
+            levels.update(last.astype(np.float64))
+        deltas = np.diff(levels.ffill().to_numpy()).reshape(-1, HOURS_PER_DAY)
+
+        for offset, day_deltas in enumerate(deltas):
+            self._deltas[first_new + timedelta(days=offset)] = day_deltas
+        self._fitted_through = last_complete
+
+        cutoff = last_complete - timedelta(days=self.window_days - 1)
+        for day in [d for d in self._deltas if d < cutoff]:
+            del self._deltas[day]
+
+    def _project(
+        self, start: datetime, level: float, max_level: float
+    ) -> Forecast | None:
+        """Project the fitted hourly profile forward from a measurement."""
+        stacked = np.vstack(list(self._deltas.values()))
+        if np.isnan(stacked).all(axis=0).any():
+            # Some hour of the day has never been observed in the window
+            return None
+        profile = np.nanmean(stacked, axis=0)
+        daily_change = float(profile.sum())
+
+        hours = np.arange(1, self.horizon_days * HOURS_PER_DAY + 1)
+        hour_of_day = (start.hour + hours) % HOURS_PER_DAY
+        levels = np.clip(level + np.cumsum(profile[hour_of_day]), 0.0, max_level)
+        times = np.datetime64(start.replace(minute=0, second=0, microsecond=0)) + (
+            hours * np.timedelta64(1, "h")
+        )
+
+        time_to_empty: timedelta | None = None
+        empty = np.flatnonzero(levels <= 0.0)
+        if empty.size:
+            time_to_empty = timedelta(hours=int(hours[empty[0]]))
+        elif daily_change < 0:
+            # Beyond the horizon, extrapolate the net daily change
+            time_to_empty = timedelta(days=level / -daily_change)
+
+        return Forecast(start, level, times, levels, daily_change, time_to_empty)
@@ -1,16 +1,77 @@
-from nicegui import ui
+from __future__ import annotations
 
-import pandas as pd
+from nicegui import app, ui
+from nicegui.run import io_bound
 
+import json
+import threading
+
+from dataclasses import dataclass
 from datetime import datetime, timedelta, date
-from statistics import mean, stdev
+from typing import TYPE_CHECKING
+from webgui.cache import ViewCache
+from webgui.profiling import track_peak_memory
 from webgui.repository import WaterDataRepository
+from webgui.startup import preload_heavy_modules
+
+# pandas, numpy and plotly are imported where they are used so that the
+# server can bind before paying their import cost
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from webgui.forecast import ConsumptionForecaster
 
 ACCENT: str = "#006400"
 
+# Tank selector entry that shows every tank side by side
+ALL_TANKS: str = "All tanks"
+
+# Per-bucket statistics sent to the browser as one float32 typed array; the
+# tooltip text is rendered client-side from them by HOVER_TEMPLATE. The level
+# mean is the trace's y value and is not repeated here.
+HOVER_COLUMNS: tuple[str, ...] = (
+    "level_min",
+    "level_max",
+    "level_std",
+    "volume_min",
+    "volume_max",
+    "volume_mean",
+    "volume_std",
+    "count",
+)
+HOVER_TEMPLATE: str = (
+    "Time: %{x|%Y-%m-%d %H:%M}<br>"
+    "Level: [%{customdata[0]:.2f}↓, %{customdata[1]:.2f}↑] (%{y:.2f} ± %{customdata[2]:.2f})<br>"
+    "Volume: [%{customdata[3]:.2f}↓, %{customdata[4]:.2f}↑] (%{customdata[5]:.2f} ± %{customdata[6]:.2f})<br>"
+    "Number of data points: %{customdata[7]:d}"
+    "<extra></extra>"
+)
+
+# Overlay colors for events detected by the collector's analytics stage
+EVENT_COLORS: dict[str, str] = {"leak": "red", "flatline": "orange"}
+
+# Room above the tallest tank shown on level axes, in meters
+LEVEL_AXIS_HEADROOM: float = 0.2
+
 # Global repository instance - will be initialized in run()
 _repository: WaterDataRepository | None = None
 
+# Whether to report tracemalloc peak memory for every view build
+_profile_memory: bool = False
+
+# Rendered views shared across all clients, keyed by (start, end, granularity,
+# tank, data version)
+_view_cache: ViewCache[PumpView] = ViewCache(max_entries=32)
+
+# Seconds between checks for new data by the background prewarmer
+PREWARM_INTERVAL_S: float = 30.0
+_prewarm_stop = threading.Event()
+
+# Consumption forecasters per tank, created and refreshed by the background
+# prewarmer
+FORECAST_DAYS: int = 7
+_forecasters: dict[str, ConsumptionForecaster] = {}
+
 
 def _convert_ui_date_to_date(ui_date_value) -> date:
     """Convert NiceGUI date input value to date object.
@@ -37,20 +98,212 @@ def get_data(
     end: datetime | date,
     granularity: str,
     repository: WaterDataRepository,
+    tank: str | None = None,
 ) -> pd.DataFrame:
-    df = repository.get_data_by_date_range(start, end)
-
-    # Always apply resampling based on granularity
-    freq_map: dict[str, str] = {
-        "minute": "T",
-        "hour": "H",
-        "day": "D",
-        "week": "W",
-        "month": "M",
+    from webgui.aggregation import finalize
+
+    # Stream the range through the incremental aggregator instead of
+    # loading every row and resampling in one go
+    stats = finalize(
+        repository.get_aggregated_data(start, end, granularity, tank=tank)
+    )
+    return stats[["time", "level_mean", "volume_mean"]].rename(
+        columns={"level_mean": "level", "volume_mean": "volume"}
+    )
+
+
+@dataclass(frozen=True)
+class PumpView:
+    """Rendered pump tab content shared by every client showing the same view."""
+
+    figure: dict | None
+    # Global stats per tank; levels of tanks with different heights are
+    # never pooled
+    stats: dict[str, dict[str, float]] | None
+    message: str = ""
+
+
+def _view_tanks(repository: WaterDataRepository, tank: str | None) -> list[str]:
+    """Resolve a tank selector value to the tank partitions it covers."""
+    if tank == ALL_TANKS:
+        return repository.tank_names
+    return [tank or repository.default_tank]
+
+
+def build_pump_view(
+    repository: WaterDataRepository,
+    start_date: date,
+    end_date: date,
+    granularity: str,
+    tank: str | None = None,
+) -> PumpView:
+    """Aggregate a date range and build the serialized figure and stats.
+
+    Args:
+        repository: Repository to read measurements from
+        start_date: First day of the range
+        end_date: Last day of the range (inclusive)
+        granularity: Bucket size, one of the keys of GRANULARITY_FREQ
+        tank: Tank name or ALL_TANKS, defaults to the first tank
+
+    Returns:
+        PumpView with a JSON-ready figure, or a message if there is no data
+    """
+    import numpy as np
+    import plotly.graph_objs as go
+
+    from webgui.aggregation import finalize, summarize
+
+    # Partial aggregates are computed chunk by chunk in compact dtypes, one
+    # thread per tank partition, so no raw copy of the range is materialized
+    tanks = _view_tanks(repository, tank)
+    partials_by_tank = repository.get_aggregated_data_by_tank(
+        start_date, end_date, granularity, tanks
+    )
+    if all(partials.empty for partials in partials_by_tank.values()):
+        return PumpView(None, None, "No data available for the selected range.")
+
+    fig = go.Figure()
+    for tank_name, partials in partials_by_tank.items():
+        buckets = finalize(partials)
+        if buckets.empty:
+            continue
+
+        fig.add_trace(
+            go.Scatter(
+                # Epoch milliseconds on a date axis, so x is sent as a typed
+                # array like y instead of one ISO string per point
+                x=buckets["time"].to_numpy().astype("datetime64[ms]").astype(np.float64),
+                y=buckets["level_mean"].to_numpy(dtype=np.float32),
+                customdata=buckets[list(HOVER_COLUMNS)].to_numpy(dtype=np.float32),
+                hovertemplate=HOVER_TEMPLATE,
+                mode="lines+markers",
+                name=tank_name if len(tanks) > 1 else "Water Level (Aggregated)",
+            )
+        )
+
+        # Overlay leak and stuck-sensor events detected by the collector
+        events = repository.get_events(start_date, end_date, tank=tank_name)
+        for event in events.itertuples(index=False):
+            fig.add_vrect(
+                x0=event.start_time,
+                x1=event.end_time,
+                fillcolor=EVENT_COLORS.get(event.kind, "gray"),
+                opacity=0.2,
+                line_width=0,
+                annotation_text=(
+                    f"{tank_name}: {event.kind}" if len(tanks) > 1 else event.kind
+                ),
+                annotation_position="top left",
+            )
+
+    if not fig.data:
+        return PumpView(None, None, "No data after aggregation.")
+
+    fig.update_layout(
+        xaxis_title="Time",
+        xaxis_type="date",
+        yaxis_title="Level",
+        title="Water Level Over Time",
+        yaxis=dict(
+            range=[
+                0,
+                max(repository.tank_height(t) for t in tanks) + LEVEL_AXIS_HEADROOM,
+            ]
+        ),
+        margin=dict(l=20, r=20, t=40, b=20),
+        height=400,
+    )
+
+    # Global stats are merged from the same partials, no second pass
+    stats = {
+        tank_name: summary
+        for tank_name, partials in partials_by_tank.items()
+        if (summary := summarize(partials)) is not None
     }
-    df = df.set_index("time").resample(freq_map[granularity]).mean().reset_index()
+    return PumpView(json.loads(fig.to_json()), stats or None)
+
 
-    return df
+def get_pump_view(
+    repository: WaterDataRepository,
+    start_date: date,
+    end_date: date,
+    granularity: str,
+    tank: str | None = None,
+) -> PumpView:
+    """Return the pump view from the shared cache, building it on a miss.
+
+    Identical concurrent requests are computed once. Keys include the data
+    version of the tanks shown, so new measurements invalidate the cached
+    views. This blocks while the view is built or awaited, so page handlers
+    call it through io_bound to keep the event loop free.
+    """
+    tank = tank or repository.default_tank
+    version = max(
+        repository.get_data_version(t) for t in _view_tanks(repository, tank)
+    )
+    key = (start_date, end_date, granularity, tank, version)
+
+    def build() -> PumpView:
+        # Only cache misses aggregate, so only they are profiled
+        with track_peak_memory(
+            f"build {tank} {start_date}..{end_date} ({granularity})",
+            enabled=_profile_memory,
+        ):
+            return build_pump_view(repository, start_date, end_date, granularity, tank)
+
+    return _view_cache.get_or_compute(key, build)
+
+
+def default_views(today: date | None = None) -> list[tuple[date, date, str]]:
+    """Views opened most often, prewarmed whenever new data lands.
+
+    Returns:
+        List of (start_date, end_date, granularity) tuples
+    """
+    today = today or date.today()
+    return [
+        (today - timedelta(days=30), today, "day"),
+        (today - timedelta(days=7), today, "hour"),
+    ]
+
+
+def _prewarm_loop(repository: WaterDataRepository, stop: threading.Event) -> None:
+    """Rebuild the default views in the background when the data changes."""
+    # Pay the heavy import cost here rather than on the first page render
+    preload_heavy_modules()
+
+    from webgui.forecast import ConsumptionForecaster
+
+    for tank in repository.tank_names:
+        _forecasters[tank] = ConsumptionForecaster(horizon_days=FORECAST_DAYS)
+
+    selectors = repository.tank_names
+    if len(selectors) > 1:
+        selectors = [*selectors, ALL_TANKS]
+
+    last_versions: dict[str, int] = {}
+    while not stop.is_set():
+        try:
+            versions = {
+                tank: repository.get_data_version(tank)
+                for tank in repository.tank_names
+            }
+            changed = {t for t, v in versions.items() if last_versions.get(t) != v}
+            if changed:
+                for tank in selectors:
+                    if tank != ALL_TANKS and tank not in changed:
+                        continue
+                    for start_date, end_date, granularity in default_views():
+                        get_pump_view(
+                            repository, start_date, end_date, granularity, tank
+                        )
+                for tank in changed:
+                    _forecasters[tank].refresh(repository, tank=tank)
+                last_versions = versions
+        except Exception as e:
+            print(f"⚠️  View prewarm failed: {e}")
+        stop.wait(PREWARM_INTERVAL_S)
 
 
 def create_pump_tab() -> None:
@@ -87,9 +340,7 @@ def create_pump_tab() -> None:
                         ui.label("Global Stats (Selected Date Range)").classes(
                             "text-lg font-semibold"
                         )
-                        global_stats_level = ui.label()
-                        global_stats_volume = ui.label()
-                        global_stats_count = ui.label()
+                        global_stats = ui.column().classes("gap-0")
                     with ui.column().classes("items-end"):
                         ui.label("Data Granularity")
                         granularity_input = ui.select(
@@ -99,12 +350,94 @@ def create_pump_tab() -> None:
                         ui.label("Note: 'minute' auto-limited to 7 days").classes(
                             "text-xs text-gray-500 mt-1"
                         )
+                        tank_options = repository.tank_names
+                        if len(tank_options) > 1:
+                            tank_options = [*tank_options, ALL_TANKS]
+                        # Only offered when more than one tank is configured
+                        with ui.column().classes("items-end mt-2") as tank_column:
+                            ui.label("Tank")
+                            tank_input = ui.select(
+                                tank_options, value=repository.default_tank
+                            ).classes("w-48")
+                        tank_column.set_visibility(len(tank_options) > 1)
+
+            # Consumption forecast, fitted in the background
+            with ui.column().classes("w-full mt-6"):
+                ui.label(f"Forecast (Next {FORECAST_DAYS} Days)").classes(
+                    "text-lg font-semibold"
+                )
+                forecast_level = ui.label()
+                forecast_empty = ui.label()
+                forecast_plot_container = ui.element("div").classes("w-full")
+
+            def render_forecast() -> None:
+                forecast_plot_container.clear()
+                if tank_input.value == ALL_TANKS:
+                    forecast_level.set_text("Select a single tank to see its forecast.")
+                    forecast_empty.set_text("")
+                    return
+
+                # Never fit on the request path; show whatever is ready
+                forecaster = _forecasters.get(tank_input.value)
+                forecast = forecaster.latest() if forecaster is not None else None
+
+                if forecast is None:
+                    forecast_level.set_text("Forecast not available yet.")
+                    forecast_empty.set_text("")
+                    return
+
+                forecast_level.set_text(
+                    f"Level: {forecast.current_level:.2f} now → "
+                    f"{forecast.levels[-1]:.2f} in {FORECAST_DAYS} days "
+                    f"({forecast.daily_change:+.3f} per day)"
+                )
+                if forecast.time_to_empty is None:
+                    forecast_empty.set_text("Estimated time to empty: not emptying")
+                else:
+                    empty_at = forecast.start + forecast.time_to_empty
+                    forecast_empty.set_text(
+                        f"Estimated time to empty: {forecast.time_to_empty.total_seconds() / 86400:.1f} days "
+                        f"({empty_at.strftime('%Y-%m-%d %H:%M')})"
+                    )
 
-            def update_graph() -> None:
+                with forecast_plot_container:
+                    ui.plotly(
+                        {
+                            "data": [
+                                {
+                                    "type": "scatter",
+                                    "mode": "lines",
+                                    "x": [str(t) for t in forecast.times],
+                                    "y": forecast.levels.round(3).tolist(),
+                                    "line": {"dash": "dash", "color": ACCENT},
+                                    "name": "Projected Level",
+                                }
+                            ],
+                            "layout": {
+                                "yaxis": {
+                                    "title": {"text": "Level"},
+                                    "range": [
+                                        0,
+                                        repository.tank_height(tank_input.value)
+                                        + LEVEL_AXIS_HEADROOM,
+                                    ],
+                                },
+                                "margin": {"l": 20, "r": 20, "t": 20, "b": 20},
+                                "height": 250,
+                            },
+                        }
+                    ).classes("w-full")
+
+            # Renders run off the event loop and may finish out of order; only
+            # the latest request updates the page
+            render_requests = [0]
+
+            async def update_graph() -> None:
                 # Convert string values from NiceGUI to datetime objects immediately
                 start_date: date = _convert_ui_date_to_date(start_input.value)
                 end_date: date = _convert_ui_date_to_date(end_input.value)
                 granularity = granularity_input.value
+                tank = tank_input.value
 
                 # Check time range limits for performance-sensitive granularities
                 date_range = (end_date - start_date).days
@@ -130,130 +463,53 @@ def create_pump_tab() -> None:
                             timeout=5000,
                         )
 
-                df = repository.get_data_by_date_range(start_date, end_date)
-
-                if df.empty:
-                    plot_container.clear()
-                    with plot_container:
-                        ui.label("No data available for the selected range.").classes(
-                            "text-red-500"
-                        )
-                    global_stats_level.set_text("")
-                    global_stats_volume.set_text("")
-                    global_stats_count.set_text("")
-                    return
-
-                df["time"] = pd.to_datetime(df["time"])
-                raw_df = df.copy()
-
-                import plotly.graph_objs as go
-
-                fig = go.Figure()
-
-                # Always apply resampling based on granularity
-                freq_map: dict[str, str] = {
-                    "minute": "min",
-                    "hour": "h",
-                    "day": "d",
-                    "week": "W",
-                    "month": "ME",
-                }
-                df.set_index("time", inplace=True)
-                groups = df.groupby(pd.Grouper(freq=freq_map[granularity]))
-
-                data: list[tuple[datetime, float, str]] = []
-                for time_val, group in groups:
-                    if group.empty:
-                        continue
-                    l_vals: list[float] = group["level"].dropna().tolist()
-                    v_vals: list[float] = group["volume"].dropna().tolist()
-                    if not l_vals or not v_vals:
-                        continue
-                    n = min(len(l_vals), len(v_vals))
-                    l_min, l_max = min(l_vals), max(l_vals)
-                    v_min, v_max = min(v_vals), max(v_vals)
-                    l_mean_val = mean(l_vals)
-                    v_mean_val = mean(v_vals)
-                    l_std = stdev(l_vals) if len(l_vals) > 1 else 0
-                    v_std = stdev(v_vals) if len(v_vals) > 1 else 0
-
-                    tooltip: str = (
-                        f"Time: {time_val.strftime('%Y-%m-%d %H:%M')}<br>"
-                        f"Level: [{l_min:.2f}↓, {l_max:.2f}↑] ({l_mean_val:.2f} ± {l_std:.2f})<br>"
-                        f"Volume: [{v_min:.2f}↓, {v_max:.2f}↑] ({v_mean_val:.2f} ± {v_std:.2f})<br>"
-                        f"Number of data points: {n}"
-                    )
-
-                    data.append((time_val.to_pydatetime(), l_mean_val, tooltip))
-
-                if not data:
-                    plot_container.clear()
-                    with plot_container:
-                        ui.label("No data after aggregation.").classes("text-red-500")
-                    global_stats_level.set_text("")
-                    global_stats_volume.set_text("")
-                    global_stats_count.set_text("")
-                    return
-
-                times, levels, tooltips = zip(*data)
-                fig.add_trace(
-                    go.Scatter(
-                        x=times,
-                        y=levels,
-                        mode="lines+markers",
-                        hoverinfo="text",
-                        text=tooltips,
-                        name="Water Level (Aggregated)",
-                    )
-                )
-
-                fig.update_layout(
-                    xaxis_title="Time",
-                    yaxis_title="Level",
-                    title="Water Level Over Time",
-                    yaxis=dict(range=[0, 3.3]),
-                    margin=dict(l=20, r=20, t=40, b=20),
-                    height=400,
+                render_requests[0] += 1
+                request = render_requests[0]
+                view = await io_bound(
+                    get_pump_view, repository, start_date, end_date, granularity, tank
                 )
+                # None when the server is shutting down
+                if view is None or request != render_requests[0]:
+                    return
+                render_graph(view)
+                render_forecast()
 
+            def render_graph(view: PumpView) -> None:
                 plot_container.clear()
                 with plot_container:
-                    ui.plotly(fig).classes("w-full")
-
-                # Update global stats below
-                level_vals: list[float] = raw_df["level"].dropna().tolist()
-                volume_vals: list[float] = raw_df["volume"].dropna().tolist()
-
-                if level_vals and volume_vals:
-                    n: int = min(len(level_vals), len(volume_vals))
-                    l_min: float
-                    l_max: float
-                    l_min, l_max = min(level_vals), max(level_vals)
-                    v_min: float
-                    v_max: float
-                    v_min, v_max = min(volume_vals), max(volume_vals)
-                    l_mean_val: float = mean(level_vals)
-                    v_mean_val: float = mean(volume_vals)
-                    l_std: float = stdev(level_vals) if len(level_vals) > 1 else 0
-                    v_std: float = stdev(volume_vals) if len(volume_vals) > 1 else 0
-
-                    global_stats_level.set_text(
-                        f"Level: [{l_min:.2f}↓, {l_max:.2f}↑] ({l_mean_val:.2f} ± {l_std:.2f})"
-                    )
-                    global_stats_volume.set_text(
-                        f"Volume: [{v_min:.2f}↓, {v_max:.2f}↑] ({v_mean_val:.2f} ± {v_std:.2f})"
-                    )
-                    global_stats_count.set_text(f"Number of data points: {n}")
-                else:
-                    global_stats_level.set_text("No data")
-                    global_stats_volume.set_text("")
-                    global_stats_count.set_text("")
+                    if view.figure is None:
+                        ui.label(view.message).classes("text-red-500")
+                    else:
+                        ui.plotly(view.figure).classes("w-full")
+
+                if _profile_memory and view.figure is not None:
+                    payload = len(json.dumps(view.figure))
+                    print(f"📦 Figure payload: {payload / 1024:.1f} KiB")
+
+                global_stats.clear()
+                with global_stats:
+                    if view.stats is not None:
+                        for tank_name, stats in view.stats.items():
+                            if len(view.stats) > 1:
+                                ui.label(tank_name).classes("font-semibold mt-2")
+                            ui.label(
+                                f"Level: [{stats['level_min']:.2f}↓, {stats['level_max']:.2f}↑] "
+                                f"({stats['level_mean']:.2f} ± {stats['level_std']:.2f})"
+                            )
+                            ui.label(
+                                f"Volume: [{stats['volume_min']:.2f}↓, {stats['volume_max']:.2f}↑] "
+                                f"({stats['volume_mean']:.2f} ± {stats['volume_std']:.2f})"
+                            )
+                            ui.label(f"Number of data points: {int(stats['count'])}")
+                    elif view.figure is not None:
+                        ui.label("No data")
 
             update_button.on("click", update_graph)
             granularity_input.on(
                 "change", update_graph
             )  # Auto-update when granularity changes
-            update_graph()
+            tank_input.on("change", update_graph)
+            ui.timer(0, update_graph, once=True)
 
 
 @ui.page("/")
@@ -286,22 +542,53 @@ def index() -> None:
     """)
 
 
+def _shutdown_worker_pool() -> None:
+    """Stop aggregation worker processes if any were started."""
+    import sys
+
+    # Only touch the pool module if a request actually used it
+    parallel = sys.modules.get("webgui.parallel")
+    if parallel is not None:
+        parallel.shutdown_pool()
+
+
 def run(
-    db_path: str = "data.db",
+    db_path: str | dict[str, str] = "data.db",
     host: str = "0.0.0.0",
     port: int = 8080,
     reload: bool = False,
+    profile_memory: bool = False,
+    workers: int = 1,
+    tank_heights: dict[str, float] | None = None,
 ) -> None:
     """Run the web application.
 
     Args:
-        db_path: Path to the SQLite database file (default: "data.db")
+        db_path: Path to the SQLite database file, or a mapping of tank name
+            to database file for multiple tanks (default: "data.db")
         host: Host to bind the server to (default: "0.0.0.0")
         port: Port to bind the server to (default: 8080)
         reload: Enable hot reload for development (default: False)
+        profile_memory: Report peak memory of every view build (default: False)
+        workers: Worker processes for long minute/hour views (default: 1)
+        tank_heights: Usable height in meters per tank name, for forecast
+            clipping and the level axis (default: repository DEFAULT_TANK_HEIGHT)
     """
-    global _repository
-    _repository = WaterDataRepository(db_path)
+    global _repository, _profile_memory
+    _repository = WaterDataRepository(db_path, workers=workers, heights=tank_heights)
+    _profile_memory = profile_memory
+
+    repository = _repository
+    app.on_startup(
+        lambda: threading.Thread(
+            target=_prewarm_loop,
+            args=(repository, _prewarm_stop),
+            name="view-prewarm",
+            daemon=True,
+        ).start()
+    )
+    app.on_shutdown(_prewarm_stop.set)
+    app.on_shutdown(_shutdown_worker_pool)
 
     ui.run(
         host=host,
@@ -0,0 +1,226 @@
+"""Process-pool aggregation of long ranges split into time shards."""
+
+import argparse
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+from webgui.aggregation import merge_partials
+from webgui.repository import WaterDataRepository
+
+# Only ranges at least this long are worth the inter-process overhead
+PARALLEL_MIN_DAYS: int = 90
+
+# Coarser granularities produce few buckets and are fast enough serially
+PARALLEL_GRANULARITIES: tuple[str, ...] = ("minute", "hour")
+
+# Shards per worker; more than one evens out shards with uneven row counts
+SHARDS_PER_WORKER: int = 2
+
+_pool: ProcessPoolExecutor | None = None
+_pool_workers: int = 0
+_pool_lock = threading.Lock()
+
+
+def get_pool(workers: int) -> ProcessPoolExecutor:
+    """Return the shared worker pool, creating it on first use.
+
+    Workers are spawned rather than forked, since the server process runs
+    threads that must not be duplicated into the children.
+    """
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+            _pool_workers = workers
+        return _pool
+
+
+def shutdown_pool() -> None:
+    """Stop the shared worker pool, if it was started."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool, _pool_workers = None, 0
+
+
+def _resolve_range(
+    repository: WaterDataRepository,
+    start_date: datetime | date | None,
+    end_date: datetime | date | None,
+    tank: str | None,
+) -> tuple[datetime, datetime] | None:
+    """Clip a requested range to the data that exists, as datetimes."""
+    bounds = repository.get_time_bounds(tank)
+    if bounds is None:
+        return None
+    first, last = bounds
+
+    start = first
+    if start_date is not None:
+        if not isinstance(start_date, datetime):
+            start_date = datetime.combine(start_date, datetime.min.time())
+        start = max(first, start_date)
+
+    end = last
+    if end_date is not None:
+        if not isinstance(end_date, datetime):
+            end_date = datetime.combine(
+                end_date, datetime.max.time().replace(microsecond=0)
+            )
+        end = min(last, end_date)
+
+    return (start, end) if start <= end else None
+
+
+def use_parallel(
+    repository: WaterDataRepository,
+    start_date: datetime | date | None,
+    end_date: datetime | date | None,
+    granularity: str,
+    tank: str | None = None,
+) -> bool:
+    """Whether a request is long and fine-grained enough to shard."""
+    if granularity not in PARALLEL_GRANULARITIES:
+        return False
+    if start_date is not None and end_date is not None:
+        # Cheap check that avoids a query for short ranges
+        if (end_date - start_date).days < PARALLEL_MIN_DAYS:  # type: ignore[operator]
+            return False
+    bounds = _resolve_range(repository, start_date, end_date, tank)
+    return bounds is not None and bounds[1] - bounds[0] >= timedelta(
+        days=PARALLEL_MIN_DAYS
+    )
+
+
+def shard_ranges(
+    start: datetime, end: datetime, shards: int
+) -> list[tuple[datetime, datetime]]:
+    """Split an inclusive range into contiguous, non-overlapping shards.
+
+    Measurement times have one-second resolution, so each shard ends one
+    second before the next one starts.
+
+    Args:
+        start: First instant of the range
+        end: Last instant of the range (inclusive)
+        shards: Number of shards
+
+    Returns:
+        List of inclusive (start, end) pairs covering the range
+    """
+    total = int((end - start).total_seconds()) + 1
+    shards = max(1, min(shards, total))
+    edges = [start + timedelta(seconds=total * i // shards) for i in range(shards + 1)]
+    return [
+        (edges[i], edges[i + 1] - timedelta(seconds=1)) for i in range(shards)
+    ]
+
+
+def _aggregate_shard(
+    db_path: str, start: datetime, end: datetime, granularity: str
+) -> pd.DataFrame:
+    """Worker entry point: aggregate one shard over a read-only connection."""
+    repository = WaterDataRepository(db_path, read_only=True)
+    return repository.get_aggregated_data(start, end, granularity)
+
+
+def aggregate_parallel(
+    repository: WaterDataRepository,
+    start_date: datetime | date | None,
+    end_date: datetime | date | None,
+    granularity: str,
+    workers: int,
+    tank: str | None = None,
+    pool: Executor | None = None,
+) -> pd.DataFrame:
+    """Aggregate a range by reading time shards in worker processes.
+
+    Each worker opens its own read-only connection and returns mergeable
+    partial aggregates (count, sum, sum of squares, min, max), which are
+    merged here. Buckets split across shard edges merge exactly.
+
+    Args:
+        repository: Repository to read measurements from
+        start_date: Optional start date/datetime
+        end_date: Optional end date/datetime
+        granularity: Bucket size, one of minute, hour, day, week, month
+        workers: Number of worker processes
+        tank: Tank name, defaults to the first tank
+        pool: Executor to use instead of the shared process pool
+
+    Returns:
+        Merged partial aggregates per bucket, see webgui.aggregation
+    """
+    bounds = _resolve_range(repository, start_date, end_date, tank)
+    if bounds is None:
+        return merge_partials([])
+
+    pool = pool or get_pool(workers)
+    db_path = str(repository._path(tank))
+    futures = [
+        pool.submit(_aggregate_shard, db_path, shard_start, shard_end, granularity)
+        for shard_start, shard_end in shard_ranges(
+            *bounds, workers * SHARDS_PER_WORKER
+        )
+    ]
+    return merge_partials(future.result() for future in futures)
+
+
+def main() -> None:
+    """Benchmark serial against process-pool aggregation."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark parallel aggregation of the web GUI",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("--db-path", default="data.db", help="SQLite database file")
+    parser.add_argument(
+        "--granularity", default="hour", help="Bucket size to aggregate into"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        nargs="+",
+        default=[1, 2, 4],
+        help="Worker counts to compare; 1 is the serial path",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per worker count")
+    args = parser.parse_args()
+
+    repository = WaterDataRepository(args.db_path, read_only=True)
+    print(f"🗄️  {args.db_path}: {repository.get_data_count()} rows, {args.granularity}")
+
+    baseline: float | None = None
+    for workers in args.workers:
+        if workers > 1:
+            pool = get_pool(workers)
+            # Spawning and importing in the workers is a one-time cost
+            list(pool.map(time.sleep, [0] * workers))
+
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            if workers > 1:
+                aggregate_parallel(repository, None, None, args.granularity, workers)
+            else:
+                repository.get_aggregated_data(None, None, args.granularity)
+            timings.append(time.perf_counter() - start)
+
+        best = min(timings)
+        baseline = baseline or best
+        print(f"{workers} worker(s): {best:.2f} s (speedup {baseline / best:.2f}x)")
+
+    shutdown_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Lightweight profiling helpers for the web GUI."""
+
+import threading
+import time
+import tracemalloc
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+# Measurements in progress; tracing runs while any of them is active
+_active: int = 0
+_started_tracing: bool = False
+_lock = threading.Lock()
+
+
+@contextmanager
+def track_peak_memory(label: str, enabled: bool = True) -> Iterator[None]:
+    """Report the tracemalloc peak and wall time of the wrapped block.
+
+    tracemalloc slows down every allocation, so it is only started when
+    enabled and stopped again once the last measurement in progress ends.
+    The peak is process-wide: measurements that overlap, e.g. from several
+    threads, report the peak of all of them together.
+
+    Args:
+        label: Description printed with the measurement
+        enabled: Skip all tracing when False
+    """
+    global _active, _started_tracing
+    if not enabled:
+        yield
+        return
+
+    with _lock:
+        if _active == 0:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                _started_tracing = True
+            tracemalloc.reset_peak()
+        _active += 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        with _lock:
+            _, peak = tracemalloc.get_traced_memory()
+            _active -= 1
+            if _active == 0 and _started_tracing:
+                tracemalloc.stop()
+                _started_tracing = False
+        print(f"📈 {label}: peak {peak / 1024 / 1024:.1f} MiB in {elapsed * 1000:.0f} ms")
@@ -1,84 +1,177 @@
 """Database repository for water measurement data."""
 
+from __future__ import annotations
+
 import sqlite3
+from collections.abc import Iterator, Mapping
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
 from pathlib import Path
 from datetime import datetime, date
-import pandas as pd
+from typing import TYPE_CHECKING
+
+# numpy and pandas are imported lazily inside the methods that need them
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Rows fetched per chunk when streaming; ~16 bytes per row in compact form
+DEFAULT_CHUNKSIZE: int = 50_000
+
+# Compact column types used by the streaming API. Time is int64 epoch seconds.
+COMPACT_DTYPES: dict[str, str] = {
+    "time": "int64",
+    "level": "float32",
+    "volume": "float32",
+}
+
+# Name and usable height in meters of the collector's default tank, used for
+# a single database path and for tanks without a configured height
+DEFAULT_TANK: str = "woodsgate"
+DEFAULT_TANK_HEIGHT: float = 3.11
 
 
 class WaterDataRepository:
-    """Repository class for accessing water measurement data from SQLite database."""
+    """Repository class for accessing water measurement data from SQLite database.
+
+    Each tank is stored in its own database file (partition). Every query
+    method takes an optional tank name and only opens that tank's file; the
+    first tank is used when no name is given.
+    """
+
+    def __init__(
+        self,
+        db_path: str | Path | Mapping[str, str | Path],
+        read_only: bool = False,
+        workers: int = 1,
+        heights: Mapping[str, float] | None = None,
+    ) -> None:
+        """Initialize repository with database path(s).
+
+        Args:
+            db_path: Path to the SQLite database file, or a mapping of tank
+                name to database file for multi-tank setups
+            read_only: Open connections with SQLite's read-only URI mode
+            workers: Worker processes for aggregating long, fine-grained
+                ranges; 1 keeps all aggregation in this process
+            heights: Usable height in meters per tank name; tanks without
+                an entry use DEFAULT_TANK_HEIGHT
+        """
+        if isinstance(db_path, Mapping):
+            self.tanks: dict[str, Path] = {
+                name: Path(path) for name, path in db_path.items()
+            }
+        else:
+            self.tanks = {DEFAULT_TANK: Path(db_path)}
+        if not self.tanks:
+            raise ValueError("At least one tank database is required")
+
+        for path in self.tanks.values():
+            if not path.exists():
+                raise FileNotFoundError(f"Database file not found: {path}")
+
+        self.default_tank = next(iter(self.tanks))
+        self.db_path = self.tanks[self.default_tank]
+        self.read_only = read_only
+        self.workers = workers
+
+        self.heights: dict[str, float] = dict(heights or {})
+        unknown = set(self.heights) - set(self.tanks)
+        if unknown:
+            raise ValueError(f"Heights given for unknown tanks: {sorted(unknown)}")
+
+    @property
+    def tank_names(self) -> list[str]:
+        """Names of all tanks, in configuration order."""
+        return list(self.tanks)
 
-    def __init__(self, db_path: str | Path) -> None:
-        """Initialize repository with database path.
+    def tank_height(self, tank: str | None = None) -> float:
+        """Usable height of a tank in meters.
 
         Args:
-            db_path: Path to the SQLite database file
+            tank: Tank name, defaults to the first tank
+
+        Returns:
+            The configured height, or DEFAULT_TANK_HEIGHT
         """
-        self.db_path = Path(db_path)
-        if not self.db_path.exists():
-            raise FileNotFoundError(f"Database file not found: {self.db_path}")
+        self._path(tank)  # Validates the tank name
+        return self.heights.get(tank or self.default_tank, DEFAULT_TANK_HEIGHT)
+
+    def _path(self, tank: str | None) -> Path:
+        """Resolve a tank name to its database partition."""
+        if tank is None:
+            return self.db_path
+        try:
+            return self.tanks[tank]
+        except KeyError:
+            raise ValueError(f"Unknown tank: {tank}") from None
+
+    def _connect(self, tank: str | None) -> sqlite3.Connection:
+        """Open a connection to a tank's database partition."""
+        path = self._path(tank)
+        if self.read_only:
+            return sqlite3.connect(f"{path.absolute().as_uri()}?mode=ro", uri=True)
+        return sqlite3.connect(path)
 
     def get_data_by_date_range(
-        self, start_date: datetime | date, end_date: datetime | date
+        self,
+        start_date: datetime | date,
+        end_date: datetime | date,
+        tank: str | None = None,
     ) -> pd.DataFrame:
         """Retrieve water measurement data for a date range.
 
         Args:
             start_date: Start date as datetime or date object
             end_date: End date as datetime or date object
+            tank: Tank name, defaults to the first tank
 
         Returns:
             DataFrame with columns: time, level, volume
         """
-        return self._get_data_by_date_range_internal(start_date, end_date)
+        return self._get_data_by_date_range_internal(start_date, end_date, tank)
 
     def get_data_by_datetime_range(
-        self, start_datetime: datetime, end_datetime: datetime
+        self,
+        start_datetime: datetime,
+        end_datetime: datetime,
+        tank: str | None = None,
     ) -> pd.DataFrame:
         """Retrieve water measurement data for a datetime range with precise time.
 
         Args:
             start_datetime: Start datetime object
             end_datetime: End datetime object
+            tank: Tank name, defaults to the first tank
 
         Returns:
             DataFrame with columns: time, level, volume
         """
-        return self._get_data_by_date_range_internal(start_datetime, end_datetime)
+        return self._get_data_by_date_range_internal(
+            start_datetime, end_datetime, tank
+        )
 
     def _get_data_by_date_range_internal(
-        self, start_date: datetime | date, end_date: datetime | date
+        self,
+        start_date: datetime | date,
+        end_date: datetime | date,
+        tank: str | None = None,
     ) -> pd.DataFrame:
         """Internal method to retrieve data by date range.
 
         Args:
             start_date: Start date/datetime
             end_date: End date/datetime
+            tank: Tank name, defaults to the first tank
 
         Returns:
             DataFrame with columns: time, level, volume
         """
-        # Convert to string format for SQL query
-        if isinstance(start_date, datetime):
-            start_str = start_date.strftime("%Y-%m-%d %H:%M:%S")
-        elif isinstance(start_date, date):
-            start_str = start_date.strftime("%Y-%m-%d")
-        else:
-            start_str = str(start_date)
+        import pandas as pd
 
-        if isinstance(end_date, datetime):
-            end_str = end_date.strftime("%Y-%m-%d %H:%M:%S")
-        elif isinstance(end_date, date):
-            # For date objects, include the full day by adding 23:59:59
-            end_datetime = datetime.combine(
-                end_date, datetime.max.time().replace(microsecond=0)
-            )
-            end_str = end_datetime.strftime("%Y-%m-%d %H:%M:%S")
-        else:
-            end_str = str(end_date)
+        start_str = self._to_sql_bound(start_date)
+        end_str = self._to_sql_bound(end_date, is_end=True)
 
-        with sqlite3.connect(self.db_path) as con:
+        with self._connect(tank) as con:
             df = pd.read_sql_query(
                 "SELECT time, level, volume FROM data WHERE time BETWEEN ? AND ?",
                 con,
@@ -91,13 +184,204 @@ class WaterDataRepository:
 
         return df
 
-    def get_all_data(self) -> pd.DataFrame:
+    @staticmethod
+    def _to_sql_bound(value: datetime | date, is_end: bool = False) -> str:
+        """Convert a date range bound to the string format used in SQL queries.
+
+        Args:
+            value: Date/datetime bound
+            is_end: Whether this is the end of the range; date objects then
+                include the full day
+
+        Returns:
+            String comparable with the time column
+        """
+        if isinstance(value, datetime):
+            return value.strftime("%Y-%m-%d %H:%M:%S")
+        elif isinstance(value, date):
+            if not is_end:
+                return value.strftime("%Y-%m-%d")
+            # For date objects, include the full day by adding 23:59:59
+            end_datetime = datetime.combine(
+                value, datetime.max.time().replace(microsecond=0)
+            )
+            return end_datetime.strftime("%Y-%m-%d %H:%M:%S")
+        else:
+            return str(value)
+
+    def iter_data_chunks(
+        self,
+        start_date: datetime | date | None = None,
+        end_date: datetime | date | None = None,
+        chunksize: int = DEFAULT_CHUNKSIZE,
+        tank: str | None = None,
+    ) -> Iterator[pd.DataFrame]:
+        """Stream water measurement data in fixed-size chunks ordered by time.
+
+        Chunks use compact dtypes (int64 epoch seconds for time, float32 for
+        level and volume) so memory stays bounded regardless of history length.
+
+        Args:
+            start_date: Optional start date/datetime, defaults to the first row
+            end_date: Optional end date/datetime, defaults to the last row
+            chunksize: Maximum number of rows per chunk
+            tank: Tank name, defaults to the first tank
+
+        Yields:
+            DataFrames with columns: time, level, volume
+        """
+        import numpy as np
+        import pandas as pd
+
+        query = (
+            "SELECT CAST(strftime('%s', time) AS INTEGER) AS time, level, volume "
+            "FROM data WHERE time IS NOT NULL"
+        )
+        params: list[str] = []
+        if start_date is not None:
+            query += " AND time >= ?"
+            params.append(self._to_sql_bound(start_date))
+        if end_date is not None:
+            query += " AND time <= ?"
+            params.append(self._to_sql_bound(end_date, is_end=True))
+        query += " ORDER BY time"
+
+        with closing(self._connect(tank)) as con:
+            cursor = con.execute(query, params)
+            while rows := cursor.fetchmany(chunksize):
+                # None becomes NaN for the float columns
+                values = np.array(rows, dtype=np.float64)
+                yield pd.DataFrame(
+                    {
+                        "time": values[:, 0].astype(COMPACT_DTYPES["time"]),
+                        "level": values[:, 1].astype(COMPACT_DTYPES["level"]),
+                        "volume": values[:, 2].astype(COMPACT_DTYPES["volume"]),
+                    }
+                )
+
+    def get_aggregated_data(
+        self,
+        start_date: datetime | date | None,
+        end_date: datetime | date | None,
+        granularity: str,
+        chunksize: int = DEFAULT_CHUNKSIZE,
+        tank: str | None = None,
+    ) -> pd.DataFrame:
+        """Aggregate a date range into time buckets without loading it whole.
+
+        Args:
+            start_date: Optional start date/datetime
+            end_date: Optional end date/datetime
+            granularity: Bucket size, one of minute, hour, day, week, month
+            chunksize: Maximum number of rows read per chunk
+            tank: Tank name, defaults to the first tank
+
+        Returns:
+            Mergeable partial aggregates per bucket, see webgui.aggregation
+        """
+        from webgui.aggregation import aggregate_chunks
+        from webgui.parallel import aggregate_parallel, use_parallel
+
+        if self.workers > 1 and use_parallel(self, start_date, end_date, granularity, tank):
+            return aggregate_parallel(
+                self, start_date, end_date, granularity, self.workers, tank=tank
+            )
+
+        return aggregate_chunks(
+            self.iter_data_chunks(start_date, end_date, chunksize, tank), granularity
+        )
+
+    def get_aggregated_data_by_tank(
+        self,
+        start_date: datetime | date | None,
+        end_date: datetime | date | None,
+        granularity: str,
+        tanks: list[str] | None = None,
+    ) -> dict[str, pd.DataFrame]:
+        """Aggregate a date range for several tanks in parallel.
+
+        Each tank is read from its own partition on its own thread; SQLite
+        releases the GIL while stepping through rows.
+
+        Args:
+            start_date: Optional start date/datetime
+            end_date: Optional end date/datetime
+            granularity: Bucket size, one of minute, hour, day, week, month
+            tanks: Tank names, defaults to all tanks
+
+        Returns:
+            Mapping of tank name to partial aggregates, see webgui.aggregation
+        """
+        tanks = tanks or self.tank_names
+        if len(tanks) == 1:
+            return {
+                tanks[0]: self.get_aggregated_data(
+                    start_date, end_date, granularity, tank=tanks[0]
+                )
+            }
+
+        with ThreadPoolExecutor(max_workers=len(tanks)) as pool:
+            futures = {
+                tank: pool.submit(
+                    self.get_aggregated_data,
+                    start_date,
+                    end_date,
+                    granularity,
+                    tank=tank,
+                )
+                for tank in tanks
+            }
+            return {tank: future.result() for tank, future in futures.items()}
+
+    def export_csv(
+        self,
+        path: str | Path,
+        start_date: datetime | date | None = None,
+        end_date: datetime | date | None = None,
+        chunksize: int = DEFAULT_CHUNKSIZE,
+        tank: str | None = None,
+    ) -> int:
+        """Export measurements to a CSV file one chunk at a time.
+
+        Args:
+            path: Destination CSV file
+            start_date: Optional start date/datetime
+            end_date: Optional end date/datetime
+            chunksize: Maximum number of rows held in memory at once
+            tank: Tank name, defaults to the first tank
+
+        Returns:
+            Number of rows written
+        """
+        import pandas as pd
+
+        written = 0
+        with open(path, "w", newline="") as f:
+            for i, chunk in enumerate(
+                self.iter_data_chunks(start_date, end_date, chunksize, tank)
+            ):
+                chunk["time"] = pd.to_datetime(chunk["time"], unit="s").dt.strftime(
+                    "%Y-%m-%d %H:%M:%S"
+                )
+                chunk.to_csv(f, header=i == 0, index=False)
+                written += len(chunk)
+        return written
+
+    def get_all_data(self, tank: str | None = None) -> pd.DataFrame:
         """Retrieve all water measurement data.
 
+        This materializes the full history; prefer iter_data_chunks or
+        get_aggregated_data for anything that can be processed incrementally.
+
+        Args:
+            tank: Tank name, defaults to the first tank
+
         Returns:
             DataFrame with columns: time, level, volume
         """
-        with sqlite3.connect(self.db_path) as con:
+        import pandas as pd
+
+        with self._connect(tank) as con:
             df = pd.read_sql_query(
                 "SELECT time, level, volume FROM data ORDER BY time",
                 con,
@@ -109,17 +393,29 @@ class WaterDataRepository:
 
         return df
 
-    def get_latest_measurement(self) -> pd.DataFrame:
+    def get_latest_measurement(
+        self, tank: str | None = None, before: datetime | date | None = None
+    ) -> pd.DataFrame:
         """Retrieve the most recent water measurement.
 
+        Args:
+            tank: Tank name, defaults to the first tank
+            before: Only consider measurements strictly before this time
+
         Returns:
             DataFrame with the latest measurement or empty DataFrame if no data
         """
-        with sqlite3.connect(self.db_path) as con:
-            df = pd.read_sql_query(
-                "SELECT time, level, volume FROM data ORDER BY time DESC LIMIT 1",
-                con,
-            )
+        import pandas as pd
+
+        query = "SELECT time, level, volume FROM data"
+        params: list[str] = []
+        if before is not None:
+            query += " WHERE time < ?"
+            params.append(self._to_sql_bound(before))
+        query += " ORDER BY time DESC LIMIT 1"
+
+        with self._connect(tank) as con:
+            df = pd.read_sql_query(query, con, params=params)
 
         # Convert time column to datetime
         if not df.empty:
@@ -127,13 +423,98 @@ class WaterDataRepository:
 
         return df
 
-    def get_data_count(self) -> int:
+    def get_events(
+        self,
+        start_date: datetime | date,
+        end_date: datetime | date,
+        tank: str | None = None,
+    ) -> pd.DataFrame:
+        """Retrieve detected events overlapping a date range.
+
+        Events are written by the collector's analytics stage. Databases
+        created before it existed have no events table and yield no events.
+
+        Args:
+            start_date: Start date/datetime
+            end_date: End date/datetime
+            tank: Tank name, defaults to the first tank
+
+        Returns:
+            DataFrame with columns: start_time, end_time, kind, magnitude
+        """
+        import pandas as pd
+
+        start_str = self._to_sql_bound(start_date)
+        end_str = self._to_sql_bound(end_date, is_end=True)
+
+        with closing(self._connect(tank)) as con:
+            try:
+                df = pd.read_sql_query(
+                    "SELECT start_time, end_time, kind, magnitude FROM events "
+                    "WHERE start_time <= ? AND end_time >= ? ORDER BY start_time",
+                    con,
+                    params=(end_str, start_str),
+                )
+            except pd.errors.DatabaseError:
+                return pd.DataFrame(
+                    columns=["start_time", "end_time", "kind", "magnitude"]
+                )
+
+        if not df.empty:
+            df["start_time"] = pd.to_datetime(df["start_time"])
+            df["end_time"] = pd.to_datetime(df["end_time"])
+
+        return df
+
+    def get_time_bounds(
+        self, tank: str | None = None
+    ) -> tuple[datetime, datetime] | None:
+        """Get the time of the first and last measurement.
+
+        Args:
+            tank: Tank name, defaults to the first tank
+
+        Returns:
+            Tuple of (first, last) datetimes, or None if there is no data
+        """
+        with closing(self._connect(tank)) as con:
+            first, last = con.execute("SELECT MIN(time), MAX(time) FROM data").fetchone()
+
+        if first is None or last is None:
+            return None
+        return datetime.fromisoformat(first), datetime.fromisoformat(last)
+
+    def get_data_version(self, tank: str | None = None) -> int:
+        """Get a cheap token that changes whenever the database is written.
+
+        Uses the modification time of the database file and its journal, so
+        it needs no query and also reflects deletes and updates.
+
+        Args:
+            tank: Tank name, defaults to the first tank
+
+        Returns:
+            Nanosecond modification time of the most recently written file
+        """
+        version = 0
+        for suffix in ("", "-wal", "-journal"):
+            try:
+                stat = Path(f"{self._path(tank)}{suffix}").stat()
+            except FileNotFoundError:
+                continue
+            version = max(version, stat.st_mtime_ns)
+        return version
+
+    def get_data_count(self, tank: str | None = None) -> int:
         """Get the total count of measurements in the database.
 
+        Args:
+            tank: Tank name, defaults to the first tank
+
         Returns:
             Number of measurement records
         """
-        with sqlite3.connect(self.db_path) as con:
+        with self._connect(tank) as con:
             cursor = con.cursor()
             cursor.execute("SELECT COUNT(*) FROM data")
             count = cursor.fetchone()[0]
@@ -149,12 +530,4 @@ class WaterDataRepository:
         Returns:
             String representation of how the date would be formatted for SQL
         """
-        if isinstance(test_date, datetime):
-            return test_date.strftime("%Y-%m-%d %H:%M:%S")
-        elif isinstance(test_date, date):
-            end_datetime = datetime.combine(
-                test_date, datetime.max.time().replace(microsecond=0)
-            )
-            return end_datetime.strftime("%Y-%m-%d %H:%M:%S")
-        else:
-            return str(test_date)
+        return self._to_sql_bound(test_date, is_end=True)
@@ -0,0 +1,87 @@
+"""Startup helpers: import-time profiling and background module preloading."""
+
+import argparse
+import importlib
+import subprocess
+import sys
+import time
+
+# Modules kept off the import path of the server and the first render
+HEAVY_MODULES: tuple[str, ...] = (
+    "numpy",
+    "pandas",
+    "plotly.graph_objs",
+    "webgui.aggregation",
+)
+
+
+def preload_heavy_modules() -> float:
+    """Import the heavy modules so the first page render doesn't have to.
+
+    Meant to run in a background thread once the server is listening.
+
+    Returns:
+        Seconds spent importing
+    """
+    start = time.perf_counter()
+    for name in HEAVY_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            print(f"⚠️  Could not preload {name}: {e}")
+    elapsed = time.perf_counter() - start
+    print(f"📦 Preloaded heavy modules in {elapsed:.2f} s")
+    return elapsed
+
+
+def profile_imports(module: str = "webgui") -> list[tuple[str, int, int]]:
+    """Import a module in a fresh interpreter with ``-X importtime``.
+
+    Args:
+        module: Module to import
+
+    Returns:
+        List of (module, self_us, cumulative_us) sorted by cumulative time
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    timings: list[tuple[str, int, int]] = []
+    for line in result.stderr.splitlines():
+        # Format: "import time: <self us> | <cumulative us> | <indented name>"
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        timings.append((name.strip(), int(self_us), int(cumulative_us)))
+
+    return sorted(timings, key=lambda t: t[2], reverse=True)
+
+
+def main() -> None:
+    """Print the slowest imports of the web GUI."""
+    parser = argparse.ArgumentParser(
+        description="Profile import time of the web GUI",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("--module", default="webgui", help="Module to import")
+    parser.add_argument(
+        "--top", type=int, default=20, help="Number of slowest imports to show"
+    )
+    args = parser.parse_args()
+
+    timings = profile_imports(args.module)
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for name, self_us, cumulative_us in timings[: args.top]:
+        print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {name}")
+
+    heavy = [name for name, _, _ in timings if name in HEAVY_MODULES]
+    if heavy:
+        print(f"⚠️  Heavy modules imported at startup: {', '.join(heavy)}")
+
+
+if __name__ == "__main__":
+    main()
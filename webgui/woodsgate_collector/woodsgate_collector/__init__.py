@@ -1,6 +1,6 @@
 """Woodsgate tank level data collector package."""
 
-from .data_collector import main
+from .cli import main
 
 __version__ = "0.1.0"
 __all__ = ["main"]
\ No newline at end of file
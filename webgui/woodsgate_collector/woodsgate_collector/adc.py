@@ -0,0 +1,52 @@
+"""ADS1115 analog input used to read the 4-20 mA level sensors."""
+
+import time
+
+import smbus2
+import struct
+
+
+####################
+### Device Setup ###
+####################
+# ADS1115 configuration
+ADS1115_ADDRESS = 0x48  # Default I2C address
+ADS1115_REG_CONFIG = 0x01
+ADS1115_REG_CONVERT = 0x00
+
+# Configuration for continuous conversion, ±4.096V range, 128 SPS
+ADS1115_CONFIG = 0x8483  # Single-shot, A0-A1 differential, ±4.096V, 128SPS
+ADS1115_MUX_MASK = 0x7000  # Input multiplexer bits; 0b100 + n selects An vs GND
+ADS1115_LSB = 4.096 / 32767.0  # [V - Voltage of one ADC code]
+
+def read_adc_voltage(channel=0, single_ended=False):
+    """Read voltage from ADS1115 pin A0-A3
+
+    Channel 0 is read as A0-A1 unless single_ended is set, as in the original
+    single-tank setup, so its calibration holds. With a sensor on A1 that
+    reading is wrong, so multi-tank setups read every channel against ground.
+    """
+    try:
+        adc_config = ADS1115_CONFIG
+        if channel != 0 or single_ended:
+            adc_config = (ADS1115_CONFIG & ~ADS1115_MUX_MASK) | ((0b100 + channel) << 12)
+        # Initialize I2C bus inside function
+        bus = smbus2.SMBus(1)
+        # Write config to start conversion
+        bus.write_i2c_block_data(ADS1115_ADDRESS, ADS1115_REG_CONFIG, 
+                                [adc_config >> 8, adc_config & 0xFF])
+        
+        # Wait for conversion (8ms for 128 SPS)
+        time.sleep(0.01)
+        
+        # Read conversion result
+        data = bus.read_i2c_block_data(ADS1115_ADDRESS, ADS1115_REG_CONVERT, 2)
+        
+        # Convert to voltage (16-bit signed, ±4.096V range)
+        raw_adc = struct.unpack('>h', bytes(data))[0]
+        voltage = raw_adc * ADS1115_LSB
+        
+        return voltage
+    except Exception as e:
+        print(f"Error reading ADC: {e}")
+        return None
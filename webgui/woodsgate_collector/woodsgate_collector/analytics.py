@@ -0,0 +1,277 @@
+"""Streaming leak and stuck-sensor detection over the data table.
+
+Detectors are O(1) per sample and keep their state in the analytics_state
+table together with the last processed data_id, so every run only reads rows
+inserted since the previous checkpoint.
+
+The collector only stores a row when the level changes (plus one closing row
+for the previous level), so a stuck sensor produces no rows at all. Every run
+therefore also compares the wall clock with the start of the current flat
+stretch and reports an ongoing flatline. Its end is moved forward in steps of
+flatline_update_hours, so an idle database is not rewritten on every run, and
+it is closed when the closing row arrives.
+"""
+
+import json
+import sqlite3
+from datetime import datetime
+
+
+##################
+### User Input ###
+##################
+
+ewma_alpha = 0.1  # Smoothing factor for the fill/drain rate EWMA
+drain_allowance = 0.05  # [m/h - Normal consumption drain rate, ignored by CUSUM]
+drain_threshold = 0.3  # [m - Excess drop beyond the allowance that raises a leak event]
+# [h - Unchanged level for this long raises a stuck-sensor event]. A full or
+# unused tank can stay at the same millimetre overnight or over a weekend.
+flatline_hours = 72.0
+flatline_update_hours = 1.0  # [h - Minimum step by which an ongoing flatline's end is moved]
+batch_size = 5000  # Rows read per batch when catching up
+
+DETECTOR_NAME = "level"
+
+
+def ensure_tables(conn: sqlite3.Connection) -> None:
+    """Create the events and analytics_state tables if they are missing."""
+    conn.execute("""
+    create table if not exists events (
+       event_id integer primary key autoincrement
+      ,start_time datetime
+      ,end_time datetime
+      ,kind text
+      ,magnitude float
+      ,detail text
+    )
+    """)
+    # One row per event; an ongoing event is re-emitted with a later end_time
+    conn.execute(
+        "create unique index if not exists events_kind_start on events (kind, start_time)"
+    )
+    conn.execute("create index if not exists events_start_time on events (start_time)")
+    conn.execute("""
+    create table if not exists analytics_state (
+       name text primary key
+      ,last_data_id integer
+      ,state text
+    )
+    """)
+    conn.commit()
+
+
+def _parse_time(value: str | None) -> datetime | None:
+    return datetime.fromisoformat(value) if value else None
+
+
+class LevelDetector:
+    """Fill/drain rate EWMA with CUSUM leak and flatline detection.
+
+    Feed rows in time order with update(); each call returns the events the
+    row opened or extended, as (start_time, end_time, kind, magnitude, detail)
+    tuples. Events are re-emitted with a later end time while they last, so
+    the stored event always covers the leak or flatline seen so far. Call
+    check_idle() when no rows arrived to extend a flatline up to now.
+    """
+
+    def __init__(self, state: dict | None = None) -> None:
+        state = state or {}
+        self.last_time: str | None = state.get("last_time")
+        self.last_level: float | None = state.get("last_level")
+        self.rate_ewma: float = state.get("rate_ewma", 0.0)
+        self.cusum: float = state.get("cusum", 0.0)
+        self.cusum_start: str | None = state.get("cusum_start")
+        self.leak_peak: float | None = state.get("leak_peak")
+        self.leak_end: str | None = state.get("leak_end")
+        self.leak_rate: float = state.get("leak_rate", 0.0)
+        self.flat_since: str | None = state.get("flat_since")
+        self.flat_reported_end: str | None = state.get("flat_reported_end")
+        self._last_dt = _parse_time(self.last_time)
+        self._flat_dt = _parse_time(self.flat_since)
+
+    def to_state(self) -> dict:
+        return {
+            "last_time": self.last_time,
+            "last_level": self.last_level,
+            "rate_ewma": self.rate_ewma,
+            "cusum": self.cusum,
+            "cusum_start": self.cusum_start,
+            "leak_peak": self.leak_peak,
+            "leak_end": self.leak_end,
+            "leak_rate": self.leak_rate,
+            "flat_since": self.flat_since,
+            "flat_reported_end": self.flat_reported_end,
+        }
+
+    def update(self, time: str, level: float | None) -> list[tuple]:
+        if level is None:
+            return []
+        now = datetime.fromisoformat(time)
+        if self._last_dt is None or self.last_level is None:
+            self.last_time, self.last_level, self._last_dt = time, level, now
+            self.flat_since, self._flat_dt = time, now
+            return []
+
+        events: list[tuple] = []
+        dt_h = (now - self._last_dt).total_seconds() / 3600
+        d_level = level - self.last_level
+
+        if d_level != 0 and self._flat_dt is not None and now > self._flat_dt:
+            # Fill (+) / drain (-) rate in m/h over the whole step. The
+            # collector writes a closing row just before every change, so the
+            # time since the previous row would only be that short gap.
+            step_h = (now - self._flat_dt).total_seconds() / 3600
+            rate = d_level / step_h
+            self.rate_ewma = ewma_alpha * rate + (1 - ewma_alpha) * self.rate_ewma
+
+        if dt_h > 0:
+            # One-sided CUSUM on drops faster than the normal consumption
+            if self.cusum == 0:
+                self.cusum_start = self.last_time
+            self.cusum = max(0.0, self.cusum - d_level - drain_allowance * dt_h)
+            if self.leak_peak is None and self.cusum > drain_threshold:
+                self._extend_leak(time)
+                events.append(self._leak_event())
+            elif self.leak_peak is not None:
+                # The leak lasts until the CUSUM stops growing; it is closed
+                # once the excess drop has been worked off again
+                if self.cusum > self.leak_peak:
+                    self._extend_leak(time)
+                    events.append(self._leak_event())
+                if self.cusum == 0:
+                    events.append(self._leak_event())
+                    self.leak_peak = None
+
+        # Flatline: the level has not changed for flatline_hours
+        if d_level != 0:
+            self.flat_since, self._flat_dt = time, now
+            self.flat_reported_end = None
+        else:
+            # Usually the closing row, which gives the flatline its final end
+            events.extend(self._flatline_event(now, time))
+
+        self.last_time, self.last_level, self._last_dt = time, level, now
+        return events
+
+    def check_idle(self, now: datetime) -> list[tuple]:
+        """Extend a flatline up to now when no new rows have arrived.
+
+        Without rows the level is still the last stored one, so the flat
+        stretch lasts at least until now.
+        """
+        if self.last_level is None or self._last_dt is None or now <= self._last_dt:
+            return []
+        if self.flat_reported_end is not None:
+            since_h = (now - datetime.fromisoformat(self.flat_reported_end)).total_seconds() / 3600
+            if since_h < flatline_update_hours:
+                return []
+        return self._flatline_event(now, now.strftime("%Y-%m-%d %H:%M:%S"))
+
+    def _flatline_event(self, now: datetime, time: str) -> list[tuple]:
+        if self._flat_dt is None:
+            return []
+        flat_h = (now - self._flat_dt).total_seconds() / 3600
+        if flat_h < flatline_hours:
+            return []
+        self.flat_reported_end = time
+        return [(
+            self.flat_since,
+            time,
+            "flatline",
+            round(flat_h, 2),
+            json.dumps({"level": self.last_level}),
+        )]
+
+    def _extend_leak(self, time: str) -> None:
+        self.leak_peak = self.cusum
+        self.leak_end = time
+        self.leak_rate = self.rate_ewma
+
+    def _leak_event(self) -> tuple:
+        return (
+            self.cusum_start,
+            self.leak_end,
+            "leak",
+            round(self.leak_peak or 0.0, 3),
+            json.dumps({"rate_ewma": round(self.leak_rate, 4)}),
+        )
+
+
+def _write_events(conn: sqlite3.Connection, events: list[tuple]) -> None:
+    conn.executemany(
+        """
+        insert into events (start_time, end_time, kind, magnitude, detail)
+        values (?, ?, ?, ?, ?)
+        on conflict (kind, start_time) do update set
+          end_time = excluded.end_time
+          ,magnitude = excluded.magnitude
+          ,detail = excluded.detail
+        """,
+        events,
+    )
+
+
+def _save_state(conn: sqlite3.Connection, last_id: int, detector: LevelDetector) -> None:
+    conn.execute(
+        "insert or replace into analytics_state (name, last_data_id, state) values (?, ?, ?)",
+        (DETECTOR_NAME, last_id, json.dumps(detector.to_state())),
+    )
+
+
+def _print_events(events: list[tuple]) -> None:
+    # Ongoing events are re-emitted on every extension; report each once
+    latest = {(kind, start): (end, magnitude) for start, end, kind, magnitude, _ in events}
+    for (kind, start), (end, magnitude) in latest.items():
+        print(f"Event detected: {kind} from {start} to {end} (magnitude {magnitude})")
+
+
+def run_analytics(conn: sqlite3.Connection, now: datetime | None = None) -> int:
+    """Process rows inserted since the last checkpoint and persist events.
+
+    Args:
+        conn: Connection to the tank database
+        now: Current time, used to extend an ongoing flatline
+
+    Returns:
+        Number of events written
+    """
+    row = conn.execute(
+        "select last_data_id, state from analytics_state where name = ?",
+        (DETECTOR_NAME,),
+    ).fetchone()
+    last_id, state = (row[0], json.loads(row[1])) if row else (0, None)
+    detector = LevelDetector(state)
+
+    written = 0
+    while True:
+        rows = conn.execute(
+            "select data_id, time, level from data where data_id > ? order by data_id limit ?",
+            (last_id, batch_size),
+        ).fetchall()
+        if not rows:
+            break
+
+        events = []
+        for data_id, time, level in rows:
+            events.extend(detector.update(time, level))
+            last_id = data_id
+
+        # Events and checkpoint are committed together so nothing is lost or
+        # reported twice if the collector restarts
+        _write_events(conn, events)
+        _save_state(conn, last_id, detector)
+        conn.commit()
+
+        _print_events(events)
+        written += len(events)
+
+    # A stuck sensor stores no rows, so check the time since the last change
+    events = detector.check_idle(now or datetime.now())
+    if events:
+        _write_events(conn, events)
+        _save_state(conn, last_id, detector)
+        conn.commit()
+        _print_events(events)
+        written += len(events)
+
+    return written
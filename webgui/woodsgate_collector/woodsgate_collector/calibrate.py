@@ -0,0 +1,198 @@
+"""Calibrate the 4 mA (v_min) and 20 mA (v_max) voltages of a tank sensor.
+
+Drive the sensor to one end of its range (empty tank or a 4 mA source for
+v_min, 20 mA for v_max), then run:
+
+    collector calibrate --tank woodsgate --point min
+
+Readings go into a fixed-bin histogram with one bin per ADS1115 code, so
+memory is constant and the result does not depend on how readings are
+rounded. The median and its 95% confidence interval are read from the
+histogram while sampling, and sampling stops once the interval is narrower
+than the tolerance. The median is written to the tank's entry in the
+collector configuration.
+"""
+
+import argparse
+import math
+import time
+from array import array
+
+from .adc import ADS1115_LSB, read_adc_voltage
+from .config import config_path, load_config, save_config, single_ended
+
+
+##################
+### User Input ###
+##################
+
+sample_interval = 0.05  # [s - Pause between readings]
+min_samples = 300  # Readings before convergence is checked
+max_duration = 300  # [s - Give up on convergence after this long]
+tolerance = 0.001  # [V - Target width of the median confidence interval]
+report_interval = 5  # [s - Time between progress lines]
+
+Z_95 = 1.96
+ADC_CODES = 32768  # Non-negative codes of the signed 16-bit conversion
+
+
+class VoltageHistogram:
+    """Streaming histogram of ADC readings with one bin per ADC code.
+
+    Percentiles are exact for the quantized readings. Mean and standard
+    deviation are kept alongside with Welford's method.
+    """
+
+    def __init__(self, lsb: float = ADS1115_LSB, bins: int = ADC_CODES) -> None:
+        self.lsb = lsb
+        self.counts = array("I", bytes(4 * bins))
+        self.n = 0
+        self.low = bins  # Lowest occupied bin
+        self.high = -1  # Highest occupied bin
+        self._mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, voltage: float) -> None:
+        code = min(max(round(voltage / self.lsb), 0), len(self.counts) - 1)
+        self.counts[code] += 1
+        self.low = min(self.low, code)
+        self.high = max(self.high, code)
+
+        self.n += 1
+        delta = voltage - self._mean
+        self._mean += delta / self.n
+        self._m2 += delta * (voltage - self._mean)
+
+    def value_at_rank(self, rank: int) -> float:
+        """Voltage of the reading with the given 1-based rank in sorted order."""
+        rank = min(max(rank, 1), self.n)
+        seen = 0
+        for code in range(self.low, self.high + 1):
+            seen += self.counts[code]
+            if seen >= rank:
+                return code * self.lsb
+        raise ValueError("Histogram is empty")
+
+    def percentile(self, q: float) -> float:
+        """Voltage below which a fraction q of the readings fall."""
+        return self.value_at_rank(math.ceil(q * self.n))
+
+    def median_interval(self) -> tuple[float, float]:
+        """95% confidence interval of the median from order statistics."""
+        half_width = Z_95 * math.sqrt(self.n) / 2
+        return (
+            self.value_at_rank(math.floor(self.n / 2 - half_width)),
+            self.value_at_rank(math.ceil(self.n / 2 + half_width) + 1),
+        )
+
+    def mode(self) -> float:
+        code = max(range(self.low, self.high + 1), key=self.counts.__getitem__)
+        return code * self.lsb
+
+    @property
+    def mean(self) -> float:
+        return self._mean
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self._m2 / (self.n - 1)) if self.n > 1 else 0.0
+
+
+def sample(
+    channel: int,
+    single_ended: bool = False,
+    interval: float = sample_interval,
+    duration: float = max_duration,
+    width: float = tolerance,
+) -> tuple[VoltageHistogram, bool]:
+    """Read a channel until the median has converged or time runs out.
+
+    Returns:
+        The histogram and whether the median converged
+    """
+    histogram = VoltageHistogram()
+    started = time.monotonic()
+    next_report = started + report_interval
+    converged = False
+
+    while time.monotonic() - started < duration:
+        voltage = read_adc_voltage(channel, single_ended)
+        if voltage is not None:
+            histogram.add(voltage)
+
+        if histogram.n >= min_samples:
+            low, high = histogram.median_interval()
+            converged = high - low <= width
+
+        now = time.monotonic()
+        if histogram.n and (converged or now >= next_report):
+            low, high = histogram.median_interval()
+            print(
+                f"{now - started:5.0f} s  n={histogram.n:5d}  "
+                f"median={histogram.percentile(0.5):.4f} V  "
+                f"95% CI=[{low:.4f}, {high:.4f}] V  "
+                f"mean={histogram.mean:.4f}±{histogram.std:.4f} V"
+            )
+            next_report = now + report_interval
+        if converged:
+            break
+
+        time.sleep(interval)
+
+    return histogram, converged
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="collector calibrate",
+        description="Measure v_min (4 mA) or v_max (20 mA) of a tank sensor",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("--tank", help="Tank to calibrate, defaults to the first tank")
+    parser.add_argument(
+        "--point",
+        choices=["min", "max"],
+        required=True,
+        help="min with the sensor at 4 mA, max at 20 mA",
+    )
+    parser.add_argument("--interval", type=float, default=sample_interval, help="Seconds between readings")
+    parser.add_argument("--max-duration", type=float, default=max_duration, help="Seconds before giving up")
+    parser.add_argument("--tolerance", type=float, default=tolerance, help="Target CI width in volts")
+    parser.add_argument("--config", default=config_path, help="Collector configuration file")
+    parser.add_argument("--dry-run", action="store_true", help="Measure without saving")
+    args = parser.parse_args(argv)
+
+    config = load_config(args.config)
+    tanks = {tank["name"]: tank for tank in config["tanks"]}
+    name = args.tank or config["tanks"][0]["name"]
+    if name not in tanks:
+        parser.error(f"Unknown tank '{name}', configured tanks: {', '.join(tanks)}")
+    tank = tanks[name]
+    key = f"v_{args.point}"
+
+    print(" --- Woodsgate Calibration --- ")
+    print(f"Tank '{name}', channel A{tank['channel']}, measuring {key} (current {tank[key]} V)")
+
+    histogram, converged = sample(
+        tank["channel"], single_ended(config), args.interval, args.max_duration, args.tolerance
+    )
+    if histogram.n == 0:
+        raise SystemExit("No readings from the ADC, nothing was saved")
+
+    median = histogram.percentile(0.5)
+    low, high = histogram.median_interval()
+    print(f"Readings: {histogram.n}")
+    print(f"Median: {median:.4f} V (95% CI {low:.4f} - {high:.4f} V)")
+    print(f"Mode: {histogram.mode():.4f} V, 5-95%: {histogram.percentile(0.05):.4f} - {histogram.percentile(0.95):.4f} V")
+
+    if not converged:
+        print(f"Did not converge within {args.max_duration:.0f} s, check that the signal is stable")
+    if args.dry_run or not converged:
+        print("Configuration not changed")
+        return
+
+    tank[key] = round(median, 4)
+    if tank["v_max"] <= tank["v_min"]:
+        raise SystemExit(f"v_max ({tank['v_max']}) must be above v_min ({tank['v_min']}), nothing was saved")
+    save_config(config, args.config)
+    print(f"Saved {key} = {tank[key]} V for '{name}' to {args.config}, restart the collector to apply")
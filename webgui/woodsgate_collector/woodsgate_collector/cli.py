@@ -0,0 +1,16 @@
+"""Command line entry point: run the collector or calibrate a sensor."""
+
+import sys
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Run the collector, or `collector calibrate ...` to calibrate a tank."""
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["calibrate"]:
+        from .calibrate import main as calibrate
+        calibrate(argv[1:])
+    elif argv:
+        raise SystemExit(f"Unknown command '{argv[0]}', usage: collector [calibrate --help]")
+    else:
+        from .data_collector import main as collect
+        collect()
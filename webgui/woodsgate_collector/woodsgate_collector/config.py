@@ -0,0 +1,92 @@
+"""Collector configuration: sample timing and the list of tanks.
+
+The configuration is a JSON file, by default /shared_data/collector.json
+(override with WOODSGATE_CONFIG). Without a file the collector runs the
+original single tank on ADS1115 channel A0, stored in /shared_data/data.db.
+
+Each tank is stored in its own database file so queries for one tank never
+touch another tank's data.
+
+A single tank on channel 0 is read as A0-A1, like the original setup. With
+several tanks every channel is read single-ended against ground, so a tank
+moving from the single-tank setup to channel 0 of a multi-tank setup must be
+recalibrated (collector calibrate). Example:
+
+    {
+      "save_time": 120,
+      "tanks": [
+        {"name": "well", "channel": 0, "v_min": 0, "v_max": 4.089,
+         "tank_height": 3.11, "database": "/shared_data/data.db"},
+        {"name": "cistern", "channel": 1, "v_min": 0.01, "v_max": 4.05,
+         "tank_height": 2.0, "database": "/shared_data/cistern.db"}
+      ]
+    }
+"""
+
+import json
+import os
+
+
+config_path = os.environ.get("WOODSGATE_CONFIG", "/shared_data/collector.json")
+
+DEFAULT_TANK = {
+    "name": "woodsgate",
+    "channel": 0,  # ADS1115 input A0-A3
+    "v_min": 0,  # Measured voltage at 4mA current
+    "v_max": 4.089,  # Measured voltage at 20mA current
+    "tank_height": 3.11,  # [m - Tank height - nozzle height - offset]
+    "volume_offset": 3.41,  # [m3 - Volume below the sensor]
+    "volume_per_meter": 3.855 * 5.06,  # [m3/m - Estimated constants for tank shape]
+    "database": "/shared_data/data.db",
+}
+
+DEFAULT_CONFIG = {
+    "save_time": 120,  # [s - Approximate time between saves]
+    "tanks": [DEFAULT_TANK],
+}
+
+
+def load_config(path: str = config_path) -> dict:
+    """Load the collector configuration, filling in defaults.
+
+    Tanks without a database get /shared_data/<name>.db.
+    """
+    config = dict(DEFAULT_CONFIG)
+    if os.path.exists(path):
+        with open(path) as f:
+            config.update(json.load(f))
+
+    tanks = []
+    for tank in config["tanks"]:
+        tank = {**DEFAULT_TANK, "database": None, **tank}
+        if tank["database"] is None:
+            tank["database"] = f"/shared_data/{tank['name']}.db"
+        tanks.append(tank)
+
+    names = [tank["name"] for tank in tanks]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Tank names must be unique: {names}")
+    databases = [tank["database"] for tank in tanks]
+    if len(set(databases)) != len(databases):
+        raise ValueError(f"Each tank needs its own database file: {databases}")
+
+    config["tanks"] = tanks
+    return config
+
+
+def single_ended(config: dict) -> bool:
+    """Whether every ADC channel is read against ground.
+
+    Only a lone tank keeps the A0-A1 differential reading of the original
+    setup; any other sensor wired to A1 would corrupt it.
+    """
+    return len(config["tanks"]) > 1
+
+
+def save_config(config: dict, path: str = config_path) -> None:
+    """Write the configuration atomically so a crash never leaves half a file."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(config, f, indent=2)
+        f.write("\n")
+    os.replace(tmp_path, path)
@@ -3,62 +3,31 @@ import os
 from datetime import datetime, timedelta
 import time
 import statistics
-import smbus2
-import struct
-
-
-database_name = '/shared_data/data.db'
-
-
-####################
-### Device Setup ###
-####################
-# ADS1115 configuration
-ADS1115_ADDRESS = 0x48  # Default I2C address
-ADS1115_REG_CONFIG = 0x01
-ADS1115_REG_CONVERT = 0x00
-
-# Configuration for continuous conversion, ±4.096V range, 128 SPS
-ADS1115_CONFIG = 0x8483  # Single-shot, A0, ±4.096V, 128SPS
-
-def read_adc_voltage():
-    """Read voltage from ADS1115 A0 pin"""
-    try:
-        # Initialize I2C bus inside function
-        bus = smbus2.SMBus(1)
-        # Write config to start conversion
-        bus.write_i2c_block_data(ADS1115_ADDRESS, ADS1115_REG_CONFIG, 
-                                [ADS1115_CONFIG >> 8, ADS1115_CONFIG & 0xFF])
-        
-        # Wait for conversion (8ms for 128 SPS)
-        time.sleep(0.01)
-        
-        # Read conversion result
-        data = bus.read_i2c_block_data(ADS1115_ADDRESS, ADS1115_REG_CONVERT, 2)
-        
-        # Convert to voltage (16-bit signed, ±4.096V range)
-        raw_adc = struct.unpack('>h', bytes(data))[0]
-        voltage = raw_adc * 4.096 / 32767.0
-        
-        return voltage
-    except Exception as e:
-        print(f"Error reading ADC: {e}")
-        return None
+
+from .adc import read_adc_voltage
+from .analytics import ensure_tables, run_analytics
+from .config import load_config, single_ended
+from .maintenance import MaintenanceScheduler, prepare_database
+
 
 ##################
 ### User Input ###
 ##################
 
-save_time = 120 # [s - Approximate time between saves]
-v_min = 0 # Measured voltage at 4mA current
-v_max = 4.089 # Measured voltage at 20mA current
-tank_height = 3.11 # [m - Tank height - nozzle height - offset]
+# Tanks, calibration and timing are read from the collector config file
+config = load_config()
+save_time = config["save_time"] # [s - Approximate time between saves]
 
 ###################
 ### Actual Code ###
 ###################
-print("\n --- Starting Woodsgate 5400 Measurements --- \n Time Between Saves: \t {} s \n Tank Height: \t\t {} m \n Minimum Measured voltage at 4mA: \t {} V \n Maximum Measured voltage at 20mA: \t {} V".format(save_time, tank_height, v_min, v_max))
-print(" --------------------------------------------")
+def print_banner():
+  print("\n --- Starting Woodsgate 5400 Measurements --- \n Time Between Saves: \t {} s".format(save_time))
+  print(" ADC Inputs: \t\t {}".format("single-ended" if single_ended(config) else "A0-A1 differential"))
+  for tank in config["tanks"]:
+    print(" Tank '{}' (A{}): \n  Tank Height: \t\t {} m \n  Minimum Measured voltage at 4mA: \t {} V \n  Maximum Measured voltage at 20mA: \t {} V \n  Database: \t\t {}".format(
+      tank["name"], tank["channel"], tank["tank_height"], tank["v_min"], tank["v_max"], tank["database"]))
+  print(" --------------------------------------------")
 
 
 def open_database(file_name:str) -> sqlite3.Connection:
@@ -85,6 +54,9 @@ def open_database(file_name:str) -> sqlite3.Connection:
     print("Created table 'data' successfully!")
     conn.commit()
 
+  ensure_tables(conn)
+  prepare_database(conn)
+
   return conn
 
 def insert_row(conn, level, volume):
@@ -126,31 +98,49 @@ def insert_row(conn, level, volume):
 
       print(f"New measurement detected. Time: {date_time}, Level: {level}")
 
+def level_and_volume(tank, voltage):
+  lvl = (voltage - tank["v_min"]) / ( (tank["v_max"] - tank["v_min"]) / tank["tank_height"])
+  volume = tank["volume_offset"] + lvl * tank["volume_per_meter"]
+  return round(lvl, 3), round(volume, 3)
+
 def main():
-    conn = open_database(database_name)
+    print_banner()
 
-    data = []
+    # One database (partition) per tank, each with its own maintenance
+    tanks = config["tanks"]
+    conns = [open_database(tank["database"]) for tank in tanks]
+    schedulers = [MaintenanceScheduler() for _ in tanks]
+
+    data = [[] for _ in tanks]
     while True:
       try:
-        voltage = read_adc_voltage()
-        # Only add valid readings (filter out obvious errors)
-        if voltage is not None and voltage > 0:
-          data.append(voltage)
+        for tank, conn, scheduler, readings in zip(tanks, conns, schedulers, data):
+          voltage = read_adc_voltage(tank["channel"], single_ended(config))
+          # Only add valid readings (filter out obvious errors)
+          if voltage is not None and voltage > 0:
+            readings.append(voltage)
+
+          if len(readings) == save_time:
+
+            median = statistics.median(readings)
+            print(f"[{tank['name']}] Median voltage: {median}V")
+
+            readings.clear()
 
-        if len(data) == save_time:
-          
-          median = statistics.median(data)
-          print(f"Median voltage: {median}V")
+            rounded_lvl, rounded_volume = level_and_volume(tank, median)
 
-          data = []
-          
-          lvl = (median - v_min) / ( (v_max - v_min) / tank_height)
-          rounded_lvl = round(lvl, 3)
+            insert_row(conn, rounded_lvl, rounded_volume)
 
-          volume = 3.41 + lvl * 3.855 * 5.06 # Estimated constants for tank shape
-          rounded_volume = round(volume, 3)
+            try:
+              run_analytics(conn)
+            except Exception as e:
+              print(f"[{tank['name']}] Error running analytics: {e}")
 
-          insert_row(conn, rounded_lvl, rounded_volume)
+          # One small maintenance step per second, never long enough to delay sampling
+          try:
+            scheduler.tick(conn)
+          except Exception as e:
+            print(f"[{tank['name']}] Error running maintenance: {e}")
 
       except Exception as e:
         print(f"Error reading sensor: {e}")
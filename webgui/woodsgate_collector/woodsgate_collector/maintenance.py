@@ -0,0 +1,180 @@
+"""Time-sliced database maintenance for the collector.
+
+Runs from the sampling loop via MaintenanceScheduler.tick(). Every tick does
+at most one small step so sampling is never stalled:
+
+- Retention: rows older than retention_days are thinned to one row per hour.
+  The collector stores the level as a step function (a row whenever it
+  changes), so the last row of each hour is kept unchanged: it holds the
+  level at the end of the hour, and the step shape between hours survives.
+  Only changes within an hour are lost.
+- Incremental vacuum returns freed pages to the file system a few at a time.
+- PRAGMA optimize / ANALYZE keep query planner statistics current.
+"""
+
+import os
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+
+##################
+### User Input ###
+##################
+
+retention_days = int(os.environ.get("WOODSGATE_RETENTION_DAYS", 90))  # [days - Full resolution history]
+thin_step_hours = 24  # [h - Hours of old data thinned per step]
+vacuum_step_pages = 256  # Pages released per incremental vacuum step
+analysis_limit = 1000  # Rows sampled per index by ANALYZE
+
+# [s - Interval between runs of each task]
+intervals = {
+    "thin": 10 * 60,
+    "vacuum": 10 * 60,
+    "optimize": 6 * 60 * 60,
+    "analyze": 24 * 60 * 60,
+}
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def prepare_database(conn: sqlite3.Connection) -> None:
+    """Create maintenance tables and indexes and enable incremental vacuum.
+
+    Converting an existing database to auto_vacuum=INCREMENTAL needs one full
+    VACUUM. This runs once at startup, before sampling begins.
+    """
+    conn.execute("""
+    create table if not exists maintenance_state (
+       name text primary key
+      ,value text
+    )
+    """)
+    conn.execute("create index if not exists data_time on data (time)")
+    conn.commit()
+
+    if conn.execute("pragma auto_vacuum").fetchone()[0] != 2:
+        print("Enabling incremental auto vacuum (one-time full VACUUM)...")
+        conn.execute("pragma auto_vacuum = incremental")
+        conn.execute("vacuum")
+        print("Incremental auto vacuum enabled")
+
+    if conn.execute("select count(*) from sqlite_master where name = 'sqlite_stat1'").fetchone()[0] == 0:
+        conn.execute(f"pragma analysis_limit = {analysis_limit}")
+        conn.execute("analyze")
+        conn.commit()
+
+
+def _get_state(conn: sqlite3.Connection, name: str) -> str | None:
+    row = conn.execute("select value from maintenance_state where name = ?", (name,)).fetchone()
+    return row[0] if row else None
+
+
+def _set_state(conn: sqlite3.Connection, name: str, value: str) -> None:
+    conn.execute(
+        "insert or replace into maintenance_state (name, value) values (?, ?)",
+        (name, value),
+    )
+
+
+def thin_step(conn: sqlite3.Connection, now: datetime | None = None) -> bool:
+    """Thin the next thin_step_hours of data older than the retention period.
+
+    Returns:
+        True if there is more data left to thin
+    """
+    cutoff = (now or datetime.now()) - timedelta(days=retention_days)
+    cutoff = cutoff.replace(minute=0, second=0, microsecond=0)
+
+    start = _get_state(conn, "thinned_through")
+    if start is None:
+        first = conn.execute("select min(time) from data").fetchone()[0]
+        if first is None:
+            return False
+        start = datetime.fromisoformat(first).replace(minute=0, second=0).strftime(TIME_FORMAT)
+
+    start_dt = datetime.fromisoformat(start)
+    if start_dt >= cutoff:
+        return False
+    end_dt = min(start_dt + timedelta(hours=thin_step_hours), cutoff)
+    end = end_dt.strftime(TIME_FORMAT)
+
+    rows = conn.execute(
+        "select data_id, time from data where time >= ? and time < ? order by time, data_id",
+        (start, end),
+    ).fetchall()
+
+    # Group by hour ("YYYY-MM-DD HH") and keep the last row of each hour
+    hours: dict[str, list[int]] = {}
+    for data_id, row_time in rows:
+        hours.setdefault(row_time[:13], []).append(data_id)
+
+    removed = [(data_id,) for ids in hours.values() for data_id in ids[:-1]]
+    conn.executemany("delete from data where data_id = ?", removed)
+
+    _set_state(conn, "thinned_through", end)
+    conn.commit()
+
+    if removed:
+        print(f"Thinned {len(removed)} rows between {start} and {end}")
+    return end_dt < cutoff
+
+
+def vacuum_step(conn: sqlite3.Connection) -> bool:
+    """Release up to vacuum_step_pages free pages.
+
+    Returns:
+        True if free pages remain
+    """
+    conn.execute(f"pragma incremental_vacuum({vacuum_step_pages})").fetchall()
+    return conn.execute("pragma freelist_count").fetchone()[0] > 0
+
+
+def optimize(conn: sqlite3.Connection) -> bool:
+    """Let SQLite refresh statistics it considers stale."""
+    conn.execute(f"pragma analysis_limit = {analysis_limit}")
+    conn.execute("pragma optimize")
+    return False
+
+
+def analyze(conn: sqlite3.Connection) -> bool:
+    """Refresh planner statistics with a bounded sample per index."""
+    conn.execute(f"pragma analysis_limit = {analysis_limit}")
+    conn.execute("analyze")
+    conn.commit()
+    return False
+
+
+TASKS = {
+    "thin": thin_step,
+    "vacuum": vacuum_step,
+    "optimize": optimize,
+    "analyze": analyze,
+}
+
+
+class MaintenanceScheduler:
+    """Runs at most one small maintenance step per tick.
+
+    A task that reports more work left stays due and continues on the next
+    tick; otherwise it waits for its interval.
+    """
+
+    def __init__(self) -> None:
+        now = time.monotonic()
+        self.next_run = {name: now for name in TASKS}
+
+    def tick(self, conn: sqlite3.Connection) -> None:
+        now = time.monotonic()
+        for name, task in TASKS.items():
+            if now < self.next_run[name]:
+                continue
+
+            started = time.perf_counter()
+            more = task(conn)
+            elapsed = time.perf_counter() - started
+            if elapsed > 0.5:
+                print(f"Maintenance task '{name}' took {elapsed:.2f} s")
+
+            self.next_run[name] = now if more else now + intervals[name]
+            return